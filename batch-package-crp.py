@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 import os
-import subprocess
+import sys
 import json
 import argparse
-from typing import List, Dict, Optional
+from typing import Dict
+from batch_common import BatchJournal, get_project_name, run_projects, print_summary, run_command, find_config_file
 
-def run_package_crp(project: Dict, defaults: Dict, args: argparse.Namespace):
+def get_journal_path(config_path: str, args: argparse.Namespace) -> str:
+    """执行日志路径，按命令、主题和配置文件区分，保存在~/.cache/dev-tool/batch-journal/下"""
+    config_name = os.path.splitext(os.path.basename(config_path))[0]
+    topic = args.topic or 'default'
+    return os.path.expanduser(f'~/.cache/dev-tool/batch-journal/batch-crp-{args.command}-{topic}-{config_name}.jsonl')
+
+def run_package_crp(project: Dict, defaults: Dict, args: argparse.Namespace, prefix_output: bool = False) -> bool:
     """执行单个项目的package-crp.py"""
     cmd = ["dev-tool", "crp", args.command if hasattr(args, 'command') else "pack"]
     
@@ -26,13 +33,13 @@ def run_package_crp(project: Dict, defaults: Dict, args: argparse.Namespace):
             else:
                 cmd.extend([f"--{param}", value])
     
-    try:
-        project_name = params.get('name', '未命名项目')
-        print(f"执行项目: {project_name}")
-        subprocess.run(cmd, check=True)
+    project_name = get_project_name(project, defaults)
+    print(f"执行项目: {project_name}")
+    if run_command(cmd, project_name, prefix_output):
         print(f"项目 {project_name} 完成")
-    except subprocess.CalledProcessError as e:
-        print(f"项目 {project_name} 执行失败: {e}")
+        return True
+    print(f"项目 {project_name} 执行失败")
+    return False
 
 def main():
     parser = argparse.ArgumentParser(description='批量执行package-crp.py')
@@ -43,31 +50,12 @@ def main():
     # 添加所有package-crp支持的参数
     parser.add_argument('--topic', help='topic名称')
     parser.add_argument('--tag', help='项目tag')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='并行执行的最大项目数（默认逐个执行，大于1时按depends依赖关系并行调度）')
+    parser.add_argument('--resume', action='store_true',
+                       help='从上次执行的日志断点续跑，只执行失败和未执行的项目')
     args = parser.parse_args()
-
-    def find_config_file(filename):
-        """查找配置文件，如果是绝对路径直接检查，否则尝试多个默认路径"""
-        # 如果是绝对路径，直接检查
-        if os.path.isabs(filename):
-            if os.path.exists(filename):
-                return filename
-            raise FileNotFoundError(f"Config file not found at absolute path: {filename}")
-
-        # 相对路径时尝试多个默认位置
-        search_paths = [
-            os.path.join(os.getcwd(), filename),  # 当前目录
-            os.path.expanduser(f'~/.config/dev-tool/packages/{filename}'),  # packages目录
-            os.path.expanduser(f'~/.config/dev-tool/{filename}')  # 默认config目录
-        ]
-        
-        for path in search_paths:
-            if os.path.exists(path):
-                return path
-                
-        raise FileNotFoundError(
-            f"Could not find config file {filename} in: current directory, "
-            f"~/.config/dev-tool/packages/, ~/.config/dev-tool/"
-        )
+    args.jobs = max(1, args.jobs)
 
     try:
         config_path = find_config_file(args.config)
@@ -75,10 +63,10 @@ def main():
             config = json.load(f)
     except FileNotFoundError:
         print(f"错误: 配置文件 {args.config} 不存在于以下路径: 当前目录, ~/.config/dev-tool/packages/, ~/.config/dev-tool/")
-        return
+        return 1
     except json.JSONDecodeError:
         print(f"错误: 配置文件 {config_path} 格式不正确")
-        return
+        return 1
 
     defaults = config.get('defaults', {})
     projects = config.get('projects', [])
@@ -87,8 +75,21 @@ def main():
         print("警告: 配置文件中没有定义项目")
         return
 
-    for project in projects:
-        run_package_crp(project, defaults, args)
+    journal = BatchJournal(get_journal_path(config_path, args), args.resume, vars(args))
+    print(f"执行日志: {journal.path} (run {journal.run_id})")
+
+    try:
+        status = run_projects(projects, defaults, args, run_package_crp, journal)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+
+    print_summary(status)
+    journal.record(event='run-end', status=status)
+    if any(state in ('failed', 'skipped') for state in status.values()):
+        print("部分项目未成功，可使用 --resume 重试失败和未执行的项目")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
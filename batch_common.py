@@ -0,0 +1,218 @@
+"""批量命令（batch-git、batch-crp、train）共用的项目依赖调度、执行日志和配置文件查找"""
+import os
+import subprocess
+import json
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional
+
+class BatchJournal:
+    """追加写入的批量执行日志，每行一条JSON记录，用于--resume断点续跑"""
+
+    def __init__(self, path: str, resume: bool = False, run_args: Optional[Dict] = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.run_id = None
+        self.completed = set()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if resume:
+            self._load_last_run()
+        if self.run_id:
+            self.record(event='run-resume', args=run_args)
+        else:
+            self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+            self.record(event='run-start', args=run_args)
+
+    def _load_last_run(self):
+        """读取最近一次执行的记录，收集已成功完成的项目"""
+        if not os.path.exists(self.path):
+            return
+        outcomes = {}
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 忽略中断时写了一半的行
+                if entry.get('event') == 'run-start':
+                    self.run_id = entry.get('run')
+                    outcomes = {}
+                elif entry.get('run') == self.run_id and entry.get('project'):
+                    outcomes[entry['project']] = entry.get('event')
+        self.completed = {name for name, event in outcomes.items() if event == 'success'}
+
+    def record(self, project: Optional[str] = None, event: str = '', **extra):
+        """追加一条记录并立即落盘"""
+        entry = {'run': self.run_id, 'time': datetime.now().isoformat(timespec='seconds'), 'event': event}
+        if project:
+            entry['project'] = project
+        entry.update({k: v for k, v in extra.items() if v is not None})
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+def get_project_name(project: Dict, defaults: Dict) -> str:
+    """获取项目名称，作为依赖关系中的标识"""
+    return project.get('name', defaults.get('name')) or '未命名项目'
+
+def get_project_keys(projects: List[Dict], defaults: Dict) -> List[str]:
+    """项目在依赖关系、执行日志和结果汇总中的标识
+
+    通常为项目名称；同一项目出现多次（如同一仓库的多个分支）时使用 名称@分支，名称和分支都相同时报错
+    """
+    names = [get_project_name(project, defaults) for project in projects]
+    keys = []
+    for project, name in zip(projects, names):
+        key = name
+        if names.count(name) > 1:
+            key = f"{name}@{project.get('branch', defaults.get('branch')) or ''}"
+        if key in keys:
+            raise ValueError(f"项目 {name} 在配置文件中重复出现（分支也相同）")
+        keys.append(key)
+    return keys
+
+def build_dependency_graph(projects: List[Dict], defaults: Dict) -> Dict[str, List[str]]:
+    """根据项目的depends字段构建依赖图（以get_project_keys为标识），检查未知依赖和循环依赖"""
+    graph = {}
+    for key, project in zip(get_project_keys(projects, defaults), projects):
+        depends = project.get('depends', [])
+        if isinstance(depends, str):
+            depends = [depends]
+        graph[key] = list(depends)
+
+    for name, depends in graph.items():
+        for dep in depends:
+            if dep not in graph:
+                if any(key.startswith(f"{dep}@") for key in graph):
+                    raise ValueError(f"项目 {name} 依赖的项目 {dep} 有多个分支，请使用 {dep}@分支 指定")
+                raise ValueError(f"项目 {name} 依赖的项目 {dep} 不在配置文件中")
+
+    # 深度优先检查循环依赖
+    visiting, visited = set(), set()
+    def visit(name, path):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"存在循环依赖: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in graph[name]:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        visited.add(name)
+    for name in graph:
+        visit(name, [])
+
+    return graph
+
+def run_projects(projects: List[Dict], defaults: Dict, args: argparse.Namespace, runner,
+                 journal: Optional[BatchJournal] = None) -> Dict[str, str]:
+    """按依赖关系调度项目：无依赖关系的项目并行执行，依赖失败时跳过下游项目
+
+    返回每个项目的状态: success / failed / skipped / done（断点续跑时已完成）
+    """
+    graph = build_dependency_graph(projects, defaults)
+    by_name = dict(zip(get_project_keys(projects, defaults), projects))
+    status = {}
+    pending = list(by_name.keys())
+
+    def run_one(name):
+        if journal:
+            journal.record(name, 'start', phase=args.command)
+        ok = runner(by_name[name], defaults, args, parallel)
+        if journal:
+            journal.record(name, 'success' if ok else 'failed', phase=args.command)
+        return ok
+
+    # 断点续跑时跳过上次已成功的项目，其下游项目视为依赖已满足
+    if journal:
+        for name in list(pending):
+            if name in journal.completed:
+                print(f"项目 {name} 已在上次执行中完成，跳过")
+                status[name] = 'done'
+                pending.remove(name)
+    running = {}
+    parallel = args.jobs > 1
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        while pending or running:
+            # 依赖失败或被跳过的项目直接跳过，重复传递直到没有新的跳过项目（与配置文件中的顺序无关）
+            skipping = True
+            while skipping:
+                skipping = False
+                for name in list(pending):
+                    broken = [dep for dep in graph[name] if status.get(dep) in ('failed', 'skipped')]
+                    if broken:
+                        print(f"跳过项目 {name}: 依赖项目 {', '.join(broken)} 未成功")
+                        status[name] = 'skipped'
+                        pending.remove(name)
+                        skipping = True
+                        if journal:
+                            journal.record(name, 'skipped', phase=args.command, reason=f"依赖失败: {', '.join(broken)}")
+
+            # 提交所有依赖已成功的项目
+            for name in list(pending):
+                if all(status.get(dep) in ('success', 'done') for dep in graph[name]):
+                    pending.remove(name)
+                    running[executor.submit(run_one, name)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status[name] = 'success' if future.result() else 'failed'
+                except Exception as e:
+                    print(f"项目 {name} 执行异常: {e}")
+                    status[name] = 'failed'
+                    if journal:
+                        journal.record(name, 'failed', phase=args.command, error=str(e))
+
+    return {name: status[name] for name in by_name}
+
+def print_summary(status: Dict[str, str]):
+    """输出批量执行结果汇总"""
+    labels = {'success': '成功', 'failed': '失败', 'skipped': '跳过', 'done': '已完成(续跑跳过)'}
+    print("\n执行结果汇总:")
+    for name, state in status.items():
+        print(f"  {name:<30} {labels.get(state, state)}")
+
+def run_command(cmd: List[str], project_name: str, prefix_output: bool) -> bool:
+    """执行命令，并行执行时为每行输出加上项目名前缀"""
+    if not prefix_output:
+        return subprocess.run(cmd).returncode == 0
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in process.stdout:
+        print(f"[{project_name}] {line}", end='', flush=True)
+    return process.wait() == 0
+
+def find_config_file(filename):
+    """查找配置文件，如果是绝对路径直接检查，否则尝试多个默认路径"""
+    # 如果是绝对路径，直接检查
+    if os.path.isabs(filename):
+        if os.path.exists(filename):
+            return filename
+        raise FileNotFoundError(f"Config file not found at absolute path: {filename}")
+
+    # 相对路径时尝试多个默认位置
+    search_paths = [
+        os.path.join(os.getcwd(), filename),  # 当前目录
+        os.path.expanduser(f'~/.config/dev-tool/packages/{filename}'),  # packages目录
+        os.path.expanduser(f'~/.config/dev-tool/{filename}')  # 默认config目录
+    ]
+
+    for path in search_paths:
+        if os.path.exists(path):
+            return path
+
+    raise FileNotFoundError(
+        f"Could not find config file {filename} in: current directory, "
+        f"~/.config/dev-tool/packages/, ~/.config/dev-tool/"
+    )
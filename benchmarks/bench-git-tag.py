@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""git-tag.py性能基准
+
+在本地生成不同规模的合成仓库（提交数、标签数、debian/changelog长度可调），
+通过url.insteadOf把https://github.com/重定向到file://裸仓库，并用桩程序代替gh，
+运行tag、test、lasttag流程，根据--trace输出按阶段统计耗时。
+
+用法:
+    python3 benchmarks/bench-git-tag.py --sizes 1000,10000,100000 --tags 300 --repeat 3
+    python3 benchmarks/bench-git-tag.py --json after.json --baseline before.json
+    python3 benchmarks/bench-git-tag.py --sizes 1000 --tags 0    # 没有标签的仓库，流程通过--tag指定版本号
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+GIT_TAG = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'git-tag.py'))
+ORG = "bench-org"
+GITHUB_ID = "bench-user"
+MAINTAINER = "Bench <bench@example.com>"
+FLOWS = ['tag-cold', 'tag-warm', 'test', 'lasttag']
+PHASES = ['clone', 'fetch', 'lasttag', 'changelog', 'commit', 'fork', 'push', 'pr', 'preview']
+
+# 基准测试用的gh桩程序：不访问网络，只返回流程需要的最小输出；auth token失败使git-tag.py走gh命令路径
+GH_STUB = f'''#!/bin/sh
+case "$1 $2" in
+    "auth token") exit 1 ;;
+    "pr create") echo "https://github.com/{ORG}/bench/pull/1" ;;
+    "pr view") echo '{{"url": "https://github.com/{ORG}/bench/pull/1"}}' ;;
+esac
+exit 0
+'''
+
+def fast_import_stream(name: str, commits: int, tags: int):
+    """生成git fast-import输入：commits个提交，均匀分布tags个轻量标签，每个标签提交前在changelog顶部追加一段"""
+    interval = max(1, commits // (tags + 1))
+    tag_points = {interval * k: f"1.0.{k}" for k in range(1, tags + 1) if interval * k < commits}
+    stanzas = []
+    base_time = 1600000000
+
+    def data(text: str) -> bytes:
+        raw = text.encode()
+        return b"data %d\n%s\n" % (len(raw), raw)
+
+    for i in range(1, commits + 1):
+        timestamp = base_time + i * 60
+        subject = f"fix: synthetic change {i}"
+        chunk = [
+            b"commit refs/heads/master\n",
+            b"mark :%d\n" % i,
+            f"committer {MAINTAINER} {timestamp} +0000\n".encode(),
+            data(subject)
+        ]
+        if i > 1:
+            chunk.append(b"from :%d\n" % (i - 1))
+        chunk.append(f"M 644 inline src/file{i % 50}.txt\n".encode())
+        chunk.append(data(f"{i}\n"))
+        if i in tag_points or i == 1:
+            version = tag_points.get(i, "1.0.0")
+            date = time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(timestamp))
+            stanzas.insert(0, f"{name} ({version}) unstable; urgency=medium\n\n"
+                              f"  * Release {version}\n  * {subject}\n\n -- {MAINTAINER}  {date}\n")
+            chunk.append(b"M 644 inline debian/changelog\n")
+            chunk.append(data("\n".join(stanzas)))
+        yield b"".join(chunk)
+        if i in tag_points:
+            yield f"reset refs/tags/{tag_points[i]}\nfrom :{i}\n\n".encode()
+
+def generate_repo(workdir: str, name: str, commits: int, tags: int):
+    """生成上游裸仓库和共享对象的fork裸仓库，已存在且参数一致时复用"""
+    upstream = os.path.join(workdir, "remotes", ORG, f"{name}.git")
+    fork = os.path.join(workdir, "remotes", GITHUB_ID, f"{name}.git")
+    marker = os.path.join(upstream, "bench.json")
+    params = {'commits': commits, 'tags': tags}
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == params:
+                return
+    shutil.rmtree(upstream, ignore_errors=True)
+    shutil.rmtree(fork, ignore_errors=True)
+    # 重新生成的仓库历史不同，旧的克隆不能复用
+    shutil.rmtree(os.path.join(workdir, "clones", name), ignore_errors=True)
+
+    start = time.monotonic()
+    subprocess.run(["git", "init", "--quiet", "--bare", upstream], check=True)
+    importer = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=upstream, stdin=subprocess.PIPE)
+    for chunk in fast_import_stream(name, commits, tags):
+        importer.stdin.write(chunk)
+    importer.stdin.close()
+    if importer.wait() != 0:
+        raise RuntimeError(f"git fast-import failed for {name}")
+    subprocess.run(["git", "gc", "--quiet"], cwd=upstream, check=True)
+    subprocess.run(["git", "clone", "--quiet", "--bare", "--shared", upstream, fork], check=True)
+    with open(marker, 'w') as f:
+        json.dump(params, f)
+    print(f"Generated {name}: {commits} commits, {tags} tags in {time.monotonic() - start:.1f}s")
+
+def prepare_env(workdir: str) -> Dict[str, str]:
+    """隔离的HOME、git全局配置和gh桩程序"""
+    home = os.path.join(workdir, "home")
+    config_dir = os.path.join(home, ".config", "dev-tool")
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, "git-tag-config.json"), 'w') as f:
+        json.dump({
+            "git": {"githubID": GITHUB_ID, "debEmail": MAINTAINER},
+            "params": {"projectBranch": "master", "projectOrg": ORG, "projectReviewers": [],
+                       "projectRootDir": os.path.join(workdir, "clones")}
+        }, f, indent=2)
+
+    gitconfig = os.path.join(workdir, "gitconfig")
+    with open(gitconfig, 'w') as f:
+        f.write(f'[url "file://{os.path.join(workdir, "remotes")}/"]\n\tinsteadOf = https://github.com/\n'
+                f'[user]\n\tname = Bench\n\temail = bench@example.com\n'
+                f'[init]\n\tdefaultBranch = master\n[advice]\n\tdetachedHead = false\n')
+
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    gh = os.path.join(bin_dir, "gh")
+    with open(gh, 'w') as f:
+        f.write(GH_STUB)
+    os.chmod(gh, 0o755)
+
+    env = dict(os.environ, HOME=home, GIT_CONFIG_GLOBAL=gitconfig, GIT_CONFIG_NOSYSTEM="1",
+               PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}", DEBEMAIL=MAINTAINER,
+               GIT_TERMINAL_PROMPT="0")
+    for key in ("GH_TOKEN", "GITHUB_TOKEN", "GH_CONFIG_DIR"):
+        env.pop(key, None)
+    return env
+
+def run_flow(flow: str, name: str, workdir: str, env: Dict[str, str],
+             extra_args: List[str] = ()) -> Optional[Dict[str, float]]:
+    """运行一次流程，返回各阶段耗时（毫秒），失败时返回None"""
+    clone_dir = os.path.join(workdir, "clones", name)
+    if flow == 'tag-cold':
+        shutil.rmtree(clone_dir, ignore_errors=True)
+    # 每次都从debian/changelog重新解析版本，不使用上次运行的缓存
+    cache = os.path.join(env['HOME'], ".cache", "dev-tool", "version-cache.json")
+    if os.path.exists(cache):
+        os.remove(cache)
+
+    command = 'tag' if flow.startswith('tag') else flow
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as trace:
+        trace_path = trace.name
+    try:
+        result = subprocess.run(
+            [sys.executable, GIT_TAG, command, "--name", name, "--org", ORG, "--branch", "master", "--trace", trace_path,
+             *extra_args],
+            env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"  {flow} failed on {name}:\n" + "\n".join((result.stdout + result.stderr).splitlines()[-10:]))
+            return None
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+    finally:
+        os.remove(trace_path)
+
+    timings = {'total': 0.0, 'subprocesses': 0}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        if event['cat'] == 'subprocess':
+            timings['subprocesses'] += 1
+        elif event['cat'] == 'phase' and event['name'].startswith('git '):
+            timings['total'] = event['dur'] / 1000
+        elif event['cat'] == 'phase':
+            timings[event['name']] = timings.get(event['name'], 0.0) + event['dur'] / 1000
+    return timings
+
+def median_timings(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    keys = {key for run in runs for key in run}
+    return {key: statistics.median(run.get(key, 0.0) for run in runs) for key in keys}
+
+def print_results(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Optional[Dict] = None):
+    columns = ['total'] + PHASES
+    for name, flows in results.items():
+        print(f"\n{name}")
+        print(f"  {'flow':<10}" + "".join(f"{column:>11}" for column in columns) + f"{'subprocs':>10}")
+        for flow, timings in flows.items():
+            if timings is None:
+                print(f"  {flow:<10} failed")
+                continue
+            line = f"  {flow:<10}" + "".join(
+                f"{timings[column]:>9.0f}ms" if column in timings else f"{'-':>11}" for column in columns
+            ) + f"{timings['subprocesses']:>10.0f}"
+            base = ((baseline or {}).get(name) or {}).get(flow)
+            if base and base.get('total'):
+                line += f"   {(timings['total'] - base['total']) / base['total'] * 100:+.1f}% vs baseline"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description='git-tag.py性能基准：合成本地仓库 + file://远程 + gh桩程序')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='仓库提交数，逗号分隔')
+    parser.add_argument('--tags', type=int, default=300, help='每个仓库的标签数（同时也是changelog段落数），0表示没有标签的仓库')
+    parser.add_argument('--flows', default=','.join(FLOWS), help=f"要运行的流程，逗号分隔: {', '.join(FLOWS)}")
+    parser.add_argument('--repeat', type=int, default=3, help='每个流程重复次数，取中位数')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'dev-tool-bench'),
+                        help='生成仓库和克隆的目录，参数不变时复用已生成的仓库')
+    parser.add_argument('--json', help='把结果写入JSON文件')
+    parser.add_argument('--baseline', help='与之前--json保存的结果比较总耗时')
+    args = parser.parse_args()
+
+    flows = [flow.strip() for flow in args.flows.split(',') if flow.strip()]
+    unknown = [flow for flow in flows if flow not in FLOWS]
+    if unknown:
+        print(f"错误: 未知的流程 {', '.join(unknown)}")
+        return 1
+    if any(flow.startswith('tag') for flow in flows) and not shutil.which('dch'):
+        print("警告: 未安装dch (devscripts)，跳过tag流程")
+        flows = [flow for flow in flows if not flow.startswith('tag')]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    env = prepare_env(workdir)
+
+    results = {}
+    # 没有标签的仓库无法自动递增版本号，需要指定--tag
+    extra_args = [] if args.tags else ["--tag", "1.0.1"]
+    for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        name = f"bench-{size}" if args.tags else f"bench-{size}-untagged"
+        generate_repo(workdir, name, size, args.tags)
+        if 'tag-cold' not in flows and not os.path.isdir(os.path.join(workdir, "clones", name)):
+            # test和lasttag需要本地缓存仓库，先克隆一次（不计时）
+            run_flow('lasttag', name, workdir, env, extra_args)
+
+        results[name] = {}
+        for flow in flows:
+            runs = [run_flow(flow, name, workdir, env, extra_args) for _ in range(max(1, args.repeat))]
+            results[name][flow] = None if any(run is None for run in runs) else median_timings(runs)
+
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    return 1 if any(timings is None for flows in results.values() for timings in flows.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
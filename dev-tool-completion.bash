@@ -6,7 +6,7 @@ _dev-tool() {
 
     case $prev in
         dev-tool)
-            COMPREPLY=( $(compgen -W "crp git batch-git batch-crp config upgrade findicon help" -- "$cur") )
+            COMPREPLY=( $(compgen -W "crp git batch-git batch-crp train config upgrade findicon help" -- "$cur") )
             return 0
             ;;
         crp)
@@ -14,7 +14,7 @@ _dev-tool() {
             return 0
             ;;
         git)
-            COMPREPLY=( $(compgen -W "tag merge test lasttag release projects" -- "$cur") )
+            COMPREPLY=( $(compgen -W "tag merge test lasttag release projects outdated prefetch" -- "$cur") )
             return 0
             ;;
         batch-git)
@@ -44,6 +44,9 @@ _dev-tool() {
         batch-crp)
             _dev-tool_batch_crp
             ;;
+        train)
+            _dev-tool_train
+            ;;
         findicon)
             _dev-tool_findicon
             ;;
@@ -70,13 +73,13 @@ _dev-tool_git() {
     _init_completion || return
 
     case $prev in
-        --name|--org|--branch|--tag|--reviewer)
+        --name|--org|--branch|--tag|--reviewer|--config|--jobs|--timeout)
             return 0
             ;;
     esac
 
     if [[ $cur == -* ]]; then
-        COMPREPLY=( $(compgen -W "--name --org --branch --tag --reviewer --verbose --quiet --help" -- "$cur") )
+        COMPREPLY=( $(compgen -W "--name --org --branch --tag --reviewer --verbose --quiet --config --jobs --refresh --timeout --wait --cloneless --install-timer --trace --help" -- "$cur") )
     fi
 }
 
@@ -85,13 +88,13 @@ _dev-tool_batch_git() {
     _init_completion || return
 
     case $prev in
-        --config|--org|--branch|--tag|--reviewer)
+        --config|--org|--branch|--tag|--reviewer|--jobs)
             return 0
             ;;
     esac
 
     if [[ $cur == -* ]]; then
-        COMPREPLY=( $(compgen -W "--config --org --branch --tag --reviewer --help" -- "$cur") )
+        COMPREPLY=( $(compgen -W "--config --org --branch --tag --reviewer --jobs --resume --help" -- "$cur") )
     fi
 }
 
@@ -100,13 +103,32 @@ _dev-tool_batch_crp() {
     _init_completion || return
 
     case $prev in
-        --config|--topic|--branch|--tag)
+        --config|--topic|--branch|--tag|--jobs)
+            return 0
+            ;;
+    esac
+
+    if [[ $cur == -* ]]; then
+        COMPREPLY=( $(compgen -W "--config --topic --branch --tag --jobs --resume --help" -- "$cur") )
+    fi
+}
+
+_dev-tool_train() {
+    local cur prev words cword
+    _init_completion || return
+
+    case $prev in
+        --config|--topic|--tag|--jobs|--timeout)
+            return 0
+            ;;
+        --from|--until)
+            COMPREPLY=( $(compgen -W "tag merge release pack" -- "$cur") )
             return 0
             ;;
     esac
 
     if [[ $cur == -* ]]; then
-        COMPREPLY=( $(compgen -W "--config --topic --branch --tag --help" -- "$cur") )
+        COMPREPLY=( $(compgen -W "--config --topic --tag --jobs --timeout --from --until --help" -- "$cur") )
     fi
 }
 
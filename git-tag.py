@@ -1,11 +1,24 @@
 import sys
 import argparse
+import contextlib
 import subprocess
 import re
 import os
 import logging
 import json
-from datetime import datetime
+import time
+import threading
+import base64
+import textwrap
+import difflib
+import glob
+import shutil
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 
 class Colors:
     RESET = '\033[0m'
@@ -46,6 +59,14 @@ class ArgsInfo:
         self.projectReviewers = []
         self.verbose = False # 是否显示详细输出
         self.quiet = False # 是否静默模式（不显示时间戳）
+        self.configFile = None # 批量扫描使用的packages文件
+        self.jobs = 16 # 并发扫描的仓库数
+        self.refreshIndex = False # 是否强制全量同步仓库索引
+        self.timeout = 60 # 等待workflow运行结束或PR变绿的超时时间（分钟）
+        self.wait = False # merge命令是否等待检查通过后再合并
+        self.cloneless = False # tag命令是否不克隆仓库，直接通过GitHub API提交
+        self.installTimer = False # prefetch命令是否安装systemd用户定时器
+        self.traceFile = None # 记录子进程调用的trace文件
         # 从配置文件读取参数
         self.projectRootDir = "~/.cache/git-tag-dir" # 默认值
         config_path = os.path.expanduser('~/.config/dev-tool/git-tag-config.json')
@@ -112,6 +133,353 @@ def find_config_file(filename):
 
 logger = setup_logging()
 
+class Tracer:
+    """记录子进程调用、GitHub API请求和各阶段耗时，导出为Chrome trace-event JSON
+
+    生成的文件可以直接在chrome://tracing或Perfetto中打开，同一线程内的阶段按时间嵌套显示。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.threadNames = {}
+        self.threadIds = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        """开始记录，并接管subprocess.run以记录每一次子进程调用"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.origin = time.perf_counter()
+        # 主线程固定显示在第一行
+        self.threadIds[threading.get_ident()] = 1
+        self.threadNames[1] = threading.current_thread().name
+        originalRun = subprocess.run
+
+        def tracedRun(cmd, *args, **kwargs):
+            start = time.perf_counter()
+            returncode = stdout = stderr = None
+            try:
+                result = originalRun(cmd, *args, **kwargs)
+                returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+                return result
+            except subprocess.CalledProcessError as e:
+                returncode, stdout, stderr = e.returncode, e.stdout, e.stderr
+                raise
+            finally:
+                command = cmd if isinstance(cmd, str) else " ".join(str(part) for part in cmd)
+                self.record(" ".join(command.split()[:2]), "subprocess", start, time.perf_counter(), {
+                    "command": command,
+                    "cwd": kwargs.get("cwd") or os.getcwd(),
+                    "exitCode": returncode,
+                    "stdoutBytes": self.outputSize(stdout),
+                    "stderrBytes": self.outputSize(stderr)
+                })
+
+        subprocess.run = tracedRun
+
+    @staticmethod
+    def outputSize(output):
+        if output is None:
+            return None
+        return len(output.encode() if isinstance(output, str) else output)
+
+    def record(self, name, category, start, end, args=None):
+        """记录一个完整事件（ph=X），时间单位为微秒"""
+        with self.lock:
+            thread = threading.current_thread()
+            tid = self.threadIds.setdefault(thread.ident, len(self.threadIds) + 1)
+            self.threadNames[tid] = thread.name
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": args or {}
+            })
+
+    @contextlib.contextmanager
+    def span(self, name, category="phase", **args):
+        """记录一个阶段，未开启trace时不做任何事"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter(), args)
+
+    def write(self, path):
+        with self.lock:
+            events = list(self.events)
+            events.extend({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": name}
+            } for tid, name in self.threadNames.items())
+        with open(os.path.expanduser(path), 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+tracer = Tracer()
+
+class GitHubAPIError(Exception):
+    """GitHub API请求失败"""
+    def __init__(self, status, message):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+class GitHubClient:
+    """内置的GitHub REST/GraphQL客户端
+
+    复用gh保存的token，所有请求共用一个连接池，认证和仓库检查结果在本次运行内缓存，
+    避免每一步都启动gh进程。
+    """
+    API_BASE = "https://api.github.com"
+
+    def __init__(self, token):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(argsInfo.jobs, 10),
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504))
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "dev-tool"
+        })
+        self.lock = threading.Lock()
+        self.viewerLogin = None
+        self.repoCache = {}
+        self.workflowCache = {}
+
+    @staticmethod
+    def loadToken():
+        """按GH_TOKEN/GITHUB_TOKEN环境变量、gh的hosts.yml、gh auth token的顺序获取token"""
+        for env in ("GH_TOKEN", "GITHUB_TOKEN"):
+            if os.environ.get(env):
+                return os.environ[env]
+
+        configDir = os.environ.get("GH_CONFIG_DIR", os.path.expanduser("~/.config/gh"))
+        try:
+            with open(os.path.join(configDir, "hosts.yml")) as f:
+                inGithub = False
+                for line in f:
+                    if not line.startswith(" "):
+                        inGithub = line.strip() == "github.com:"
+                    elif inGithub and line.strip().startswith("oauth_token:"):
+                        return line.split(":", 1)[1].strip().strip('"\'')
+        except OSError:
+            pass
+
+        # token保存在系统keyring中时只能通过gh读取
+        try:
+            result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except OSError:
+            pass
+        return None
+
+    def request(self, method, path, **kwargs):
+        """发送REST请求，返回解析后的JSON（无内容时返回None）"""
+        url = path if path.startswith("https://") else f"{self.API_BASE}/{path.lstrip('/')}"
+        with tracer.span(f"{method} {url.replace(self.API_BASE, '')}", "http"):
+            response = self.session.request(method, url, timeout=30, **kwargs)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise GitHubAPIError(response.status_code, message)
+        if not response.content:
+            return None
+        return response.json()
+
+    def graphql(self, query, variables=None):
+        """发送GraphQL请求，返回data部分"""
+        result = self.request("POST", "graphql", json={"query": query, "variables": variables or {}})
+        if result.get("errors") and not result.get("data"):
+            raise GitHubAPIError(200, "; ".join(error.get("message", "") for error in result["errors"]))
+        return result["data"]
+
+    def repoInfo(self, owner, name):
+        """一次GraphQL请求同时完成认证检查和仓库查询，结果在本次运行内缓存
+
+        仓库不存在时返回None。
+        """
+        key = f"{owner}/{name}"
+        with self.lock:
+            if key in self.repoCache:
+                return self.repoCache[key]
+
+        data = self.graphql(
+            """query($owner: String!, $name: String!) {
+                viewer { login }
+                repository(owner: $owner, name: $name) { nameWithOwner defaultBranchRef { name } }
+            }""",
+            {"owner": owner, "name": name}
+        )
+        repo = data.get("repository")
+        info = None
+        if repo:
+            info = {
+                "fullName": repo["nameWithOwner"],
+                "defaultBranch": (repo.get("defaultBranchRef") or {}).get("name", "master")
+            }
+        with self.lock:
+            self.viewerLogin = data["viewer"]["login"]
+            self.repoCache[key] = info
+        return info
+
+    def ensureFork(self, org, name, owner):
+        """确保owner下存在org/name的fork"""
+        if self.repoInfo(owner, name):
+            return False
+        self.request("POST", f"repos/{org}/{name}/forks", json={"default_branch_only": True})
+        with self.lock:
+            self.repoCache[f"{owner}/{name}"] = {"fullName": f"{owner}/{name}", "defaultBranch": None}
+        return True
+
+    def createPullRequest(self, repo, head, base, title, body, reviewers=None):
+        pr = self.request("POST", f"repos/{repo}/pulls", json={
+            "title": title,
+            "head": head,
+            "base": base,
+            "body": body
+        })
+        if reviewers:
+            self.request("POST", f"repos/{repo}/pulls/{pr['number']}/requested_reviewers",
+                         json={"reviewers": list(reviewers)})
+        return pr
+
+    def findPullRequest(self, repo, head, state="open"):
+        """按head（owner:branch）查找PR，没有时返回None"""
+        pulls = self.request("GET", f"repos/{repo}/pulls", params={"head": head, "state": state, "per_page": 1})
+        return pulls[0] if pulls else None
+
+    def mergePullRequest(self, repo, number, method="rebase"):
+        return self.request("PUT", f"repos/{repo}/pulls/{number}/merge", json={"merge_method": method})
+
+    def dispatchWorkflow(self, repo, workflowName, ref):
+        """按名称查找workflow并触发workflow_dispatch，返回workflow信息"""
+        key = (repo, workflowName)
+        workflow = self.workflowCache.get(key)
+        if workflow is None:
+            workflows = self.request("GET", f"repos/{repo}/actions/workflows", params={"per_page": 100})
+            for item in workflows.get("workflows", []):
+                if item.get("name") == workflowName:
+                    workflow = item
+                    break
+            if workflow is None:
+                raise GitHubAPIError(404, f"could not find workflow '{workflowName}'")
+            with self.lock:
+                self.workflowCache[key] = workflow
+        self.request("POST", f"repos/{repo}/actions/workflows/{workflow['id']}/dispatches", json={"ref": ref})
+        return workflow
+
+    def findDispatchedRun(self, repo, workflowId, since):
+        """查找since之后由当前用户通过workflow_dispatch触发的最新一次运行"""
+        runs = self.request("GET", f"repos/{repo}/actions/workflows/{workflowId}/runs", params={
+            "event": "workflow_dispatch",
+            "created": f">={since.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            "per_page": 5
+        })
+        for run in runs.get("workflow_runs", []):
+            if not self.viewerLogin or (run.get("actor") or {}).get("login") == self.viewerLogin:
+                return run
+        return None
+
+    def getFileContent(self, repo, path, ref):
+        """读取仓库中某个提交下的文件内容"""
+        data = self.request("GET", f"repos/{repo}/contents/{path}", params={"ref": ref})
+        return base64.b64decode(data["content"]).decode("utf-8")
+
+    def compareCommits(self, repo, base, head):
+        return self.request("GET", f"repos/{repo}/compare/{base}...{head}")
+
+    def setBranch(self, repo, branch, sha):
+        """创建分支，已存在时强制更新到sha"""
+        try:
+            self.request("POST", f"repos/{repo}/git/refs", json={"ref": f"refs/heads/{branch}", "sha": sha})
+        except GitHubAPIError as e:
+            if e.status != 422:
+                raise
+            self.request("PATCH", f"repos/{repo}/git/refs/heads/{branch}", json={"sha": sha, "force": True})
+
+    def createCommitOnBranch(self, repo, branch, expectedHeadOid, headline, body, files):
+        """通过GraphQL createCommitOnBranch在分支上提交文件修改，files为路径到内容的映射"""
+        data = self.graphql(
+            """mutation($input: CreateCommitOnBranchInput!) {
+                createCommitOnBranch(input: $input) { commit { oid url } }
+            }""",
+            {"input": {
+                "branch": {"repositoryNameWithOwner": repo, "branchName": branch},
+                "message": {"headline": headline, "body": body},
+                "expectedHeadOid": expectedHeadOid,
+                "fileChanges": {"additions": [
+                    {"path": path, "contents": base64.b64encode(content.encode("utf-8")).decode("ascii")}
+                    for path, content in files.items()
+                ]}
+            }}
+        )
+        return data["createCommitOnBranch"]["commit"]
+
+    def queryNodes(self, nodeIds, fragment):
+        """通过GraphQL nodes批量查询对象，每次最多100个，返回node id到对象的映射"""
+        result = {}
+        for i in range(0, len(nodeIds), 100):
+            data = self.graphql(
+                "query($ids: [ID!]!) { nodes(ids: $ids) { %s } }" % fragment,
+                {"ids": nodeIds[i:i + 100]}
+            )
+            for node in data.get("nodes") or []:
+                if node:
+                    result[node["id"]] = node
+        return result
+
+    def workflowRunsStatus(self, nodeIds):
+        """一次请求批量查询多个workflow运行的状态"""
+        return self.queryNodes(
+            nodeIds,
+            "... on WorkflowRun { id url createdAt updatedAt checkSuite { status conclusion } }"
+        )
+
+    def pullRequestsStatus(self, nodeIds):
+        """一次请求批量查询多个PR的状态、评审结论和最新提交的检查结果"""
+        return self.queryNodes(
+            nodeIds,
+            """... on PullRequest {
+                id number url state mergeable reviewDecision
+                commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+            }"""
+        )
+
+githubClient = None
+githubClientLoaded = False
+
+def getGitHubClient():
+    """获取本次运行共用的GitHub客户端，没有可用token时返回None（回退到gh命令）"""
+    global githubClient, githubClientLoaded
+    if not githubClientLoaded:
+        githubClientLoaded = True
+        token = GitHubClient.loadToken()
+        if token:
+            githubClient = GitHubClient(token)
+        else:
+            logger.debug("No GitHub token available, falling back to gh CLI")
+    return githubClient
+
 def createRepo():
     try:
         result = subprocess.run(
@@ -185,6 +553,139 @@ def fetchLastTag():
         logger.error(f"Unexpected error in fetchLastTag: {str(e)}")
         return None
 
+VERSION_CACHE_FILE = "~/.cache/dev-tool/version-cache.json"
+versionCache = None
+versionCacheLock = threading.Lock()
+
+def changelogVersion(changelog):
+    """读取debian/changelog第一段的版本号（去掉epoch）"""
+    match = re.match(r'^\S+ \(([^)]+)\)', changelog)
+    if not match:
+        return None
+    return match.group(1).split(':', 1)[-1]
+
+def versionCacheEntry(key, entry=None):
+    """读取或写入按分支HEAD缓存的版本解析结果"""
+    global versionCache
+    path = os.path.expanduser(VERSION_CACHE_FILE)
+    with versionCacheLock:
+        if versionCache is None:
+            try:
+                with open(path) as f:
+                    versionCache = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                versionCache = {}
+        if entry is None:
+            return versionCache.get(key)
+
+        versionCache[key] = entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpPath = f"{path}.{os.getpid()}.tmp"
+        with open(tmpPath, 'w') as f:
+            json.dump(versionCache, f)
+        os.replace(tmpPath, path)
+        return entry
+
+def fetchBranchIfMissing(repoDir, branch, sha):
+    """本地仓库中没有该提交时只拉取目标分支（不拉取标签）"""
+    if subprocess.run(["git", "cat-file", "-e", f"{sha}^{{commit}}"], cwd=repoDir, capture_output=True).returncode != 0:
+        subprocess.run(["git", "fetch", "--no-tags", "origin", branch], cwd=repoDir, check=True, capture_output=True, text=True)
+
+def readBranchChangelog(org, name, branch, headSha, repoDir=None, github=None):
+    """读取分支HEAD上的debian/changelog，本地仓库只拉取该分支，不拉取标签"""
+    if repoDir:
+        fetchBranchIfMissing(repoDir, branch, headSha)
+        return subprocess.run(
+            ["git", "show", f"{headSha}:debian/changelog"],
+            cwd=repoDir,
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+    if github:
+        return github.getFileContent(f"{org}/{name}", "debian/changelog", headSha)
+    raise RuntimeError(f"{org}/{name} is not cloned and no GitHub token is available")
+
+def describeLastTag(branch, headSha, tags, repoDir=None):
+    """回退方案：在分支历史中找最近的带标签提交，相当于git describe，仓库没有标签时返回None
+
+    只使用ls-remote得到的标签和已拉取的分支历史，不拉取标签；没有本地仓库或分支历史中没有标签时
+    取远程标签中版本号最大的。
+    """
+    if not tags:
+        return None
+    if not repoDir:
+        return latestVersionTag(tags)
+
+    fetchBranchIfMissing(repoDir, branch, headSha)
+    tagsByCommit = {}
+    for tag, sha in tags.items():
+        tagsByCommit.setdefault(sha, []).append(tag)
+    # 按提交时间从近到远遍历分支历史，找到第一个带标签的提交即停止
+    with subprocess.Popen(["git", "rev-list", headSha], cwd=repoDir, stdout=subprocess.PIPE, text=True) as revList:
+        for line in revList.stdout:
+            candidates = tagsByCommit.get(line.strip())
+            if candidates:
+                revList.kill()
+                return latestVersionTag(candidates) or sorted(candidates)[-1]
+    return latestVersionTag(tags)
+
+def resolveLastVersion(org, name, branch, repoDir=None, github=None):
+    """根据目标分支debian/changelog第一段确定上次发布的版本，按分支HEAD缓存
+
+    只通过git ls-remote读取分支和标签引用，不下载标签对象。changelog中的版本没有对应标签时
+    回退到git describe并报告不一致。返回(标签, 标签指向的提交, 分支HEAD)，仓库没有标签时标签和提交为None。
+    """
+    headSha, tags = lsRemoteRefs(org, name, branch, repoDir)
+    if not headSha:
+        raise RuntimeError(f"branch {branch} not found in {org}/{name}")
+
+    # 缓存changelog版本，标签每次都按ls-remote的结果重新匹配，之后补推的标签可以立即生效
+    key = f"{org}/{name}@{headSha}"
+    entry = versionCacheEntry(key)
+    if entry is None:
+        version = changelogVersion(readBranchChangelog(org, name, branch, headSha, repoDir, github))
+        entry = versionCacheEntry(key, {'changelogVersion': version})
+    else:
+        logger.debug(f"Using cached changelog version of {key}: {entry['changelogVersion']}")
+
+    version = entry['changelogVersion']
+    candidates = [version, version.rsplit('-', 1)[0]] if version else []
+    tag = next((prefix + candidate for candidate in candidates for prefix in ("", "v")
+                if prefix + candidate in tags), None)
+    if tag is None:
+        tag = entry.get('describedTag')
+        if tag is None:
+            tag = describeLastTag(branch, headSha, tags, repoDir)
+            versionCacheEntry(key, dict(entry, describedTag=tag))
+        if tag is None:
+            logger.warning(f"{org}/{name}: no tags found in the repository")
+        else:
+            logger.warning(f"{org}/{name}: debian/changelog on {branch} is at {version}, "
+                           f"but the matching tag was not found, using {tag} from git describe")
+    return tag, tags.get(tag), headSha
+
+def resolveLastTagCommit():
+    """在当前仓库中确定上个标签及其指向的提交，解析失败时回退到fetchLastTag（此时标签已拉取到本地，提交为None）"""
+    try:
+        lastTag, tagSha, _ = resolveLastVersion(argsInfo.projectOrg, argsInfo.projectName, argsInfo.projectBranch,
+                                                repoDir=os.getcwd(), github=getGitHubClient())
+        logger.info(f"Found last tag: {lastTag}")
+        return lastTag, tagSha
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, RuntimeError, GitHubAPIError) as e:
+        message = e.stderr.strip() if getattr(e, 'stderr', None) else str(e)
+        logger.warning(f"Resolve version from debian/changelog failed, falling back to git describe: {message}")
+        return fetchLastTag(), None
+
+def resolveLastTag():
+    """在当前仓库中确定上个标签，解析失败时回退到fetchLastTag"""
+    return resolveLastTagCommit()[0]
+
+def fetchTagIfMissing(repoDir, tag, sha):
+    """标签指向的提交不在已拉取的分支历史中时只拉取该标签"""
+    if subprocess.run(["git", "cat-file", "-e", f"{sha}^{{commit}}"], cwd=repoDir, capture_output=True).returncode != 0:
+        subprocess.run(["git", "fetch", "--no-tags", "origin", f"refs/tags/{tag}"], cwd=repoDir, check=True, capture_output=True, text=True)
+
 def autoGeneratedTagByLastTag(lastTag):
     increment_part = 'patch'  # 默认递增部分为 'patch' {major}.{minor}.{patch}
     parts = lastTag.split('.')
@@ -215,76 +716,82 @@ def autoGeneratedTagByLastTag(lastTag):
 def initTagPR():
     try:
         # Git operations
-        subprocess.run(
-            "git fetch origin",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        
-        subprocess.run(
-            ["git", "reset", "--hard", f"origin/{argsInfo.projectBranch}"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        
-        subprocess.run(
-            f"git checkout -B dev-changelog origin/{argsInfo.projectBranch}",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        with tracer.span("fetch"):
+            # 只拉取目标分支，上个版本由debian/changelog和ls-remote确定，不需要下载所有标签
+            subprocess.run(
+                ["git", "fetch", "--no-tags", "origin", argsInfo.projectBranch],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            
+            subprocess.run(
+                ["git", "reset", "--hard", f"origin/{argsInfo.projectBranch}"],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            
+            subprocess.run(
+                f"git checkout -B dev-changelog origin/{argsInfo.projectBranch}",
+                shell=True,
+                check=True,
+                capture_output=True,
+                text=True
+            )
 
         # Set DEBEMAIL environment variable
         os.environ["DEBEMAIL"] = argsInfo.debEmail
 
-        lastTag = fetchLastTag()
+        with tracer.span("lasttag"):
+            lastTag, tagSha = resolveLastTagCommit()
+            if tagSha:
+                fetchTagIfMissing(os.getcwd(), lastTag, tagSha)
         logger.info(f"Last Tag: {lastTag}")
 
-        if argsInfo.autoGeneratedProjectTag:
-            argsInfo.projectTag = autoGeneratedTagByLastTag(lastTag)
-        
+        argsInfo.projectTag = nextProjectTag(lastTag)
         logger.info(f"Project Tag: {argsInfo.projectTag}")
 
-        # Get commit info
-        commit_result = subprocess.run(
-            ["git", "log", "--pretty=format:%s", "--no-merges", f"{lastTag}..HEAD"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        commitInfo = commit_result.stdout
-        if not commitInfo:
-            commitInfo = f"Release {argsInfo.projectTag}"
+        with tracer.span("changelog"):
+            # Get commit info
+            commit_result = subprocess.run(
+                # 仓库还没有标签时取分支的全部历史
+                ["git", "log", "--pretty=format:%s", "--no-merges", f"{tagSha or lastTag}..HEAD" if lastTag else "HEAD"],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            commitInfo = commit_result.stdout
+            if not commitInfo:
+                commitInfo = f"Release {argsInfo.projectTag}"
 
-        logger.info(f"Changelog Info: {commitInfo}")
+            logger.info(f"Changelog Info: {commitInfo}")
 
-        # Process changelog
-        with subprocess.Popen(
-            ["xargs", "-d", "\n", "-I", "{}", "dch", "-v", argsInfo.projectTag, "{}"],
-            stdin=subprocess.PIPE,
-            text=True
-        ) as dch_process:
-            dch_process.communicate(input=commitInfo)
+            # Process changelog
+            with tracer.span("xargs dch", "subprocess", command=f"xargs -I {{}} dch -v {argsInfo.projectTag} {{}}"):
+                with subprocess.Popen(
+                    ["xargs", "-d", "\n", "-I", "{}", "dch", "-v", argsInfo.projectTag, "{}"],
+                    stdin=subprocess.PIPE,
+                    text=True
+                ) as dch_process:
+                    dch_process.communicate(input=commitInfo)
 
-        subprocess.run(
-            "dch -r ''",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True
-        )
+            subprocess.run(
+                "dch -r ''",
+                shell=True,
+                check=True,
+                capture_output=True,
+                text=True
+            )
 
         # Commit changes
-        subprocess.run(
-            ["git", "commit", "-a", "-m", f"chore: bump version to {argsInfo.projectTag}\n\nupdate changelog to {argsInfo.projectTag}"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        with tracer.span("commit"):
+            subprocess.run(
+                ["git", "commit", "-a", "-m", f"chore: bump version to {argsInfo.projectTag}\n\nupdate changelog to {argsInfo.projectTag}"],
+                check=True,
+                capture_output=True,
+                text=True
+            )
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to initialize tag PR: {e.stderr}")
@@ -293,63 +800,293 @@ def initTagPR():
         logger.error(f"Unexpected error in initTagPR: {str(e)}")
         raise
 
+def renderChangelogStanza(changelog, version, entries, maintainer, date=None):
+    """按dch -v VERSION和dch -r的效果在内存中生成新的changelog段落，返回新的changelog全文
+
+    包名和发布目标沿用changelog第一段的内容，条目按dch的方式折行。
+    """
+    header = re.match(r'^(\S+) \(([^)]+)\) ([^;]+);', changelog)
+    if not header:
+        raise ValueError("无法解析debian/changelog的第一行")
+    source, distribution = header.group(1), header.group(3).strip()
+    if distribution == "UNRELEASED":
+        distribution = "unstable"
+
+    lines = [f"{source} ({version}) {distribution}; urgency=medium", ""]
+    for entry in entries:
+        lines.extend(textwrap.wrap(entry, width=80, initial_indent="  * ", subsequent_indent="    ",
+                                   break_long_words=False, break_on_hyphens=False) or ["  * "])
+    lines.append("")
+    lines.append(f" -- {maintainer}  {date or email.utils.formatdate(localtime=True)}")
+    lines.append("")
+    return "\n".join(lines) + "\n" + changelog
+
+def changelogEntriesFromCompare(comparison, projectTag):
+    """从compare结果中取出非合并提交的标题，顺序与git log一致（新提交在前）"""
+    subjects = [
+        commit["commit"]["message"].split("\n", 1)[0]
+        for commit in comparison.get("commits", [])
+        if len(commit.get("parents", [])) <= 1
+    ]
+    subjects.reverse()
+    return subjects or [f"Release {projectTag}"]
+
+def nextProjectTag(lastTag):
+    """确定本次的版本号：指定了--tag时直接使用，否则根据上个标签自动递增；仓库还没有标签时必须指定--tag"""
+    if argsInfo.autoGeneratedProjectTag:
+        if lastTag is None:
+            raise ValueError("仓库还没有标签，无法自动生成版本号，请通过--tag指定")
+        return autoGeneratedTagByLastTag(lastTag)
+    return argsInfo.projectTag
+
+def resolveChangelogFromApi(github, org, name, branch):
+    """通过git ls-remote和GitHub API获取生成changelog所需的信息，不需要本地仓库
+
+    返回(分支HEAD, 上个标签, 新版本号, changelog条目, 当前debian/changelog内容)。
+    """
+    repo = f"{org}/{name}"
+    with tracer.span("lasttag"):
+        lastTag, tagSha, headSha = resolveLastVersion(org, name, branch, github=github)
+        version = nextProjectTag(lastTag)
+
+    with tracer.span("changelog"):
+        if lastTag and tagSha != headSha:
+            entries = changelogEntriesFromCompare(github.compareCommits(repo, tagSha, headSha), version)
+        else:
+            entries = [f"Release {version}"]
+
+        changelog = github.getFileContent(repo, "debian/changelog", headSha)
+    return headSha, lastTag, version, entries, changelog
+
+def resolveChangelogFromLocalRepo(repoDir, project):
+    """只基于本地缓存仓库的引用获取生成changelog所需的信息，不修改工作区
+
+    返回(分支HEAD, 上个标签, 新版本号, changelog条目, 当前debian/changelog内容)。
+    """
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=repoDir, check=True, capture_output=True, text=True).stdout
+
+    branch = project['branch']
+    with tracer.span("lasttag"):
+        lastTag, tagSha, headSha = resolveLastVersion(project['org'], project['name'], branch, repoDir=repoDir)
+        version = nextProjectTag(lastTag)
+    with tracer.span("changelog"):
+        # 版本缓存命中时分支可能还没有拉取到最新HEAD
+        fetchBranchIfMissing(repoDir, branch, headSha)
+        # 仓库还没有标签时取分支的全部历史
+        base = tagSha or lastTag
+        subjects = git("log", "--pretty=format:%s", "--no-merges", f"{base}..{headSha}" if base else headSha).splitlines()
+        entries = [subject for subject in subjects if subject] or [f"Release {version}"]
+        changelog = git("show", f"{headSha}:debian/changelog")
+    return headSha, lastTag, version, entries, changelog
+
+def clonelessTagPR(github):
+    """不克隆仓库，通过GitHub API生成changelog提交并创建标签PR
+
+    读取目标分支的debian/changelog和自上个标签以来的提交标题，在内存中生成新段落，
+    在fork上创建dev-changelog分支并用一次createCommitOnBranch提交，然后创建PR。
+    """
+    org, name = argsInfo.projectOrg, argsInfo.projectName
+    repo = f"{org}/{name}"
+    fork = f"{argsInfo.githubID}/{name}"
+    try:
+        headSha, lastTag, argsInfo.projectTag, entries, changelog = resolveChangelogFromApi(
+            github, org, name, argsInfo.projectBranch)
+        logger.info(f"Last Tag: {lastTag}")
+        logger.info(f"Project Tag: {argsInfo.projectTag}")
+        logger.info("Changelog Info: " + "\n".join(entries))
+
+        newChangelog = renderChangelogStanza(changelog, argsInfo.projectTag, entries, argsInfo.debEmail)
+
+        with tracer.span("fork"):
+            if github.ensureFork(org, name, argsInfo.githubID):
+                logger.info(f"Forked repository {repo}")
+        # 新建的fork需要一段时间才可用
+        with tracer.span("push"):
+            for attempt in range(5):
+                try:
+                    github.setBranch(fork, "dev-changelog", headSha)
+                    break
+                except GitHubAPIError as e:
+                    if attempt == 4 or e.status not in (404, 409, 422):
+                        raise
+                    time.sleep(2 * (attempt + 1))
+
+        with tracer.span("commit"):
+            commit = github.createCommitOnBranch(
+                fork, "dev-changelog", headSha,
+                f"chore: bump version to {argsInfo.projectTag}",
+                f"update changelog to {argsInfo.projectTag}",
+                {"debian/changelog": newChangelog}
+            )
+        logger.debug(f"Created commit {commit['oid']} on {fork}:dev-changelog")
+
+        with tracer.span("pr"):
+            pr = github.createPullRequest(
+                repo,
+                f"{argsInfo.githubID}:dev-changelog",
+                argsInfo.projectBranch,
+                f"chore: bump version to {argsInfo.projectTag}",
+                f"update changelog to {argsInfo.projectTag}",
+                argsInfo.projectReviewers
+            )
+        logger.info(f"✅ Successfully created PR for tag {argsInfo.projectTag}")
+        logger.info(f"🔗 PR链接: {pr['html_url']}")
+        print(f"\n🚀 PR已创建! 请查看: {pr['html_url']}\n")
+    except GitHubAPIError as e:
+        logger.error(f"Failed to create tag PR: {e.message}")
+        raise SystemExit(1)
+    except Exception as e:
+        logger.error(f"Unexpected error in clonelessTagPR: {str(e)}")
+        raise SystemExit(1)
+
+def previewProjectTag(project):
+    """只基于引用生成单个项目的changelog预览，优先使用本地缓存仓库，否则使用GitHub API"""
+    repo = f"{project['org']}/{project['name']}"
+    result = {'repo': repo, 'lastTag': None, 'version': None, 'diff': '', 'error': None}
+    try:
+        repoDir = os.path.join(os.path.expanduser(argsInfo.projectRootDir), project['name'])
+        github = getGitHubClient()
+        with tracer.span("preview", repo=repo):
+            if os.path.isdir(os.path.join(repoDir, ".git")):
+                _, lastTag, version, entries, changelog = resolveChangelogFromLocalRepo(repoDir, project)
+            elif github:
+                _, lastTag, version, entries, changelog = resolveChangelogFromApi(
+                    github, project['org'], project['name'], project['branch'])
+            else:
+                raise RuntimeError(f"{repoDir} is not cloned and no GitHub token is available (gh auth login)")
+
+        newChangelog = renderChangelogStanza(changelog, version, entries, argsInfo.debEmail)
+        result.update(lastTag=lastTag, version=version, diff="".join(difflib.unified_diff(
+            changelog.splitlines(keepends=True),
+            newChangelog.splitlines(keepends=True),
+            "a/debian/changelog",
+            "b/debian/changelog"
+        )))
+    except subprocess.CalledProcessError as e:
+        result['error'] = e.stderr.strip() if e.stderr else str(e)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def previewTags():
+    """预览标签变更：不重置工作区、不提交，只根据上个标签、提交记录和changelog生成diff
+
+    指定--config时并发预览packages文件中的所有项目。
+    """
+    if argsInfo.configFile:
+        try:
+            projects = loadConfigProjects(argsInfo.configFile)
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            raise SystemExit(1)
+    else:
+        projects = [{'org': argsInfo.projectOrg, 'name': argsInfo.projectName, 'branch': argsInfo.projectBranch}]
+        repoDir = os.path.join(os.path.expanduser(argsInfo.projectRootDir), argsInfo.projectName)
+        if not os.path.isdir(repoDir) and not getGitHubClient():
+            # 没有缓存仓库也没有token时先克隆
+            createOrUpdateRepo()
+
+    with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+        results = list(executor.map(previewProjectTag, projects))
+
+    hasError = False
+    for result in results:
+        if result['error']:
+            hasError = True
+            logger.error(f"{result['repo']}: {result['error']}")
+            continue
+        if len(results) > 1:
+            print(f"==== {result['repo']} ({result['lastTag']} -> {result['version']}) ====")
+        else:
+            logger.info(f"Last Tag: {result['lastTag']}")
+            logger.info(f"Project Tag: {result['version']}")
+        print(result['diff'])
+
+    if hasError:
+        raise SystemExit(1)
+
 def createTagPR():
     try:
-        # Check if forked repo exists
-        fork_check = subprocess.run(
-            ["gh", "repo", "view", f"{argsInfo.githubID}/{argsInfo.projectName}"],
-            capture_output=True,
-            text=True
-        )
-        
-        if fork_check.returncode != 0:
-            # Fork the repo if not exists
-            logger.info(f"Forking repository {argsInfo.projectOrg}/{argsInfo.projectName}")
-            fork_result = subprocess.run(
-                ["gh", "repo", "fork", f"{argsInfo.projectOrg}/{argsInfo.projectName}", "--clone=false"],
+        repo = f"{argsInfo.projectOrg}/{argsInfo.projectName}"
+        github = getGitHubClient()
+
+        # Check if forked repo exists, fork the repo if not exists
+        with tracer.span("fork"):
+            if github:
+                if github.ensureFork(argsInfo.projectOrg, argsInfo.projectName, argsInfo.githubID):
+                    logger.info(f"Forked repository {repo}")
+            else:
+                fork_check = subprocess.run(
+                    ["gh", "repo", "view", f"{argsInfo.githubID}/{argsInfo.projectName}"],
+                    capture_output=True,
+                    text=True
+                )
+            
+                if fork_check.returncode != 0:
+                    logger.info(f"Forking repository {repo}")
+                    fork_result = subprocess.run(
+                        ["gh", "repo", "fork", repo, "--clone=false"],
+                        check=True,
+                        capture_output=True,
+                        text=True
+                    )
+                    logger.debug(f"Fork output: {fork_result.stdout}")
+
+        # Push to github
+        with tracer.span("push"):
+            push_result = subprocess.run(
+                "git push github dev-changelog -f",
+                shell=True,
                 check=True,
                 capture_output=True,
                 text=True
             )
-            logger.debug(f"Fork output: {fork_result.stdout}")
+            logger.debug(f"Push output: {push_result.stdout}")
 
-        # Push to github
-        push_result = subprocess.run(
-            "git push github dev-changelog -f",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        logger.debug(f"Push output: {push_result.stdout}")
-
-        # Prepare PR creation command
-        args = [
-            "gh", "pr", "create",
-            "--repo", f"{argsInfo.projectOrg}/{argsInfo.projectName}",
-            "--head", f"{argsInfo.githubID}:dev-changelog",
-            "--base", argsInfo.projectBranch,
-            "--title", f"chore: bump version to {argsInfo.projectTag}",
-            "--body", f"update changelog to {argsInfo.projectTag}"
-        ]
-        
-        # Add reviewers if specified
-        if argsInfo.projectReviewers:
-            reviewers = []
-            for value in argsInfo.projectReviewers:
-                reviewers.extend(['--reviewer', value])
-            args.extend(reviewers)
-        
-        # Create PR
-        pr_result = subprocess.run(
-            args,
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        with tracer.span("pr"):
+            title = f"chore: bump version to {argsInfo.projectTag}"
+            body = f"update changelog to {argsInfo.projectTag}"
+            if github:
+                pr = github.createPullRequest(
+                    repo,
+                    f"{argsInfo.githubID}:dev-changelog",
+                    argsInfo.projectBranch,
+                    title,
+                    body,
+                    argsInfo.projectReviewers
+                )
+                pr_url = pr.get("html_url", "")
+                logger.debug(f"PR creation output: {pr_url}")
+            else:
+                # Prepare PR creation command
+                args = [
+                    "gh", "pr", "create",
+                    "--repo", repo,
+                    "--head", f"{argsInfo.githubID}:dev-changelog",
+                    "--base", argsInfo.projectBranch,
+                    "--title", title,
+                    "--body", body
+                ]
+            
+                # Add reviewers if specified
+                if argsInfo.projectReviewers:
+                    reviewers = []
+                    for value in argsInfo.projectReviewers:
+                        reviewers.extend(['--reviewer', value])
+                    args.extend(reviewers)
+            
+                # Create PR
+                pr_result = subprocess.run(
+                    args,
+                    check=True,
+                    capture_output=True,
+                    text=True
+                )
+                pr_url = pr_result.stdout.strip()
+                logger.debug(f"PR creation output: {pr_result.stdout}")
         
-        # 提取PR链接
-        pr_url = pr_result.stdout.strip()
+        # 输出PR链接
         if pr_url:
             logger.info(f"✅ Successfully created PR for tag {argsInfo.projectTag}")
             logger.info(f"🔗 PR链接: {pr_url}")
@@ -357,34 +1094,49 @@ def createTagPR():
         else:
             logger.info(f"Successfully created PR for tag {argsInfo.projectTag}")
         
-        logger.debug(f"PR creation output: {pr_result.stdout}")
-        
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to create tag PR: {e.stderr}")
         raise
+    except GitHubAPIError as e:
+        logger.error(f"Failed to create tag PR: {e.message}")
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in createTagPR: {str(e)}")
         raise
 
 def mergePR():
+    repo = f"{argsInfo.projectOrg}/{argsInfo.projectName}"
+    head = f"{argsInfo.githubID}:dev-changelog"
     try:
-        merge_result = subprocess.run(
-            ["gh", "pr", "merge", "--repo", f"{argsInfo.projectOrg}/{argsInfo.projectName}", "-r", f"{argsInfo.githubID}:dev-changelog"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        github = getGitHubClient()
+        if github:
+            pr = github.findPullRequest(repo, head)
+            if not pr:
+                raise GitHubAPIError(404, f"no open pull request found for {head}")
+            with tracer.span("merge"):
+                github.mergePullRequest(repo, pr["number"])
+            logger.info("✅ Successfully merged PR")
+            logger.info(f"🔗 已合并的PR: {pr['html_url']}")
+            print(f"\n🎉 PR已成功合并! PR链接: {pr['html_url']}\n")
+            return
+
+        with tracer.span("merge"):
+            merge_result = subprocess.run(
+                ["gh", "pr", "merge", "--repo", repo, "-r", head],
+                check=True,
+                capture_output=True,
+                text=True
+            )
         logger.info("✅ Successfully merged PR")
         
         # 获取PR链接信息
         try:
             pr_info = subprocess.run(
-                ["gh", "pr", "view", "--repo", f"{argsInfo.projectOrg}/{argsInfo.projectName}", f"{argsInfo.githubID}:dev-changelog", "--json", "url"],
+                ["gh", "pr", "view", "--repo", repo, head, "--json", "url"],
                 capture_output=True,
                 text=True
             )
             if pr_info.returncode == 0:
-                import json
                 pr_data = json.loads(pr_info.stdout)
                 pr_url = pr_data.get('url', '')
                 if pr_url:
@@ -397,12 +1149,51 @@ def mergePR():
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to merge PR: {e.stderr}")
         raise
+    except GitHubAPIError as e:
+        logger.error(f"Failed to merge PR: {e.message}")
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in mergePR: {str(e)}")
         raise
 
+def runReleaseWithClient(github):
+    """通过内置GitHub客户端触发Auto Release workflow"""
+    repo_name = f"{argsInfo.projectOrg}/{argsInfo.projectName}"
+    try:
+        repo_info = github.repoInfo(argsInfo.projectOrg, argsInfo.projectName)
+        if not repo_info:
+            logger.error(f"Repository {repo_name} not found or not accessible")
+            raise SystemExit(1)
+
+        logger.info(f"Triggering 'Auto Release' workflow for {repo_name}")
+        github.dispatchWorkflow(repo_name, "Auto Release", repo_info["defaultBranch"])
+    except GitHubAPIError as e:
+        if e.status == 401:
+            logger.error("GitHub token is invalid or expired")
+            logger.error("Please run: gh auth login")
+        else:
+            logger.error(f"Failed to trigger 'Auto Release' workflow: {e.message}")
+            if e.status == 404:
+                logger.error("Make sure the 'Auto Release' workflow exists in the repository")
+                logger.error("Check: https://github.com/{}/actions".format(repo_name))
+        raise SystemExit(1)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"GitHub API request failed: {str(e)}")
+        raise SystemExit(1)
+
+    logger.info("✅ Successfully triggered 'Auto Release' workflow")
+    logger.info("🚀 The workflow will automatically create tags and PRs")
+    print(f"\n🎉 Auto Release workflow triggered for {repo_name}!")
+    print("📋 You can check the workflow status at:")
+    print(f"   https://github.com/{repo_name}/actions")
+
 def runRelease():
     """执行GitHub Auto Release workflow"""
+    github = getGitHubClient()
+    if github:
+        runReleaseWithClient(github)
+        return
+
     try:
         # 检查gh命令是否可用
         gh_check = subprocess.run(
@@ -473,88 +1264,730 @@ def runRelease():
         logger.error(f"Unexpected error in runRelease: {str(e)}")
         raise SystemExit(1)
 
-def searchProjects():
-    """搜索GitHub组织下的项目，支持模糊搜索并按更新时间排序"""
+def dispatchRelease(github, project):
+    """触发单个项目的Auto Release workflow，返回运行跟踪记录"""
+    repo = f"{project['org']}/{project['name']}"
+    run = {'repo': repo, 'workflowId': None, 'since': None, 'nodeId': None, 'url': '',
+           'status': 'dispatching', 'conclusion': None, 'createdAt': None, 'updatedAt': None}
     try:
-        # 构建gh命令
-        org = argsInfo.projectOrg
-        search_query = argsInfo.projectName
-        
-        if search_query:
-            # 使用gh命令进行搜索，按pushedAt排序，过滤包含搜索关键词的项目
-            jq_filter = f'.[] | select(.name | test("{search_query}"; "i")) | {{name: .name, pushedAt: .pushedAt, url: .url}}'
+        repoInfo = github.repoInfo(project['org'], project['name'])
+        if not repoInfo:
+            raise GitHubAPIError(404, "repository not found")
+        # 留出时钟误差，查找运行时按创建时间过滤
+        run['since'] = datetime.now(timezone.utc) - timedelta(seconds=30)
+        workflow = github.dispatchWorkflow(repo, "Auto Release", repoInfo['defaultBranch'])
+        run['workflowId'] = workflow['id']
+        run['status'] = 'dispatched'
+        logger.info(f"Triggered 'Auto Release' workflow for {repo}")
+    except (GitHubAPIError, requests.exceptions.RequestException) as e:
+        logger.error(f"Failed to trigger 'Auto Release' workflow for {repo}: {e}")
+        run['status'] = 'completed'
+        run['conclusion'] = 'dispatch_failed'
+    return run
+
+def findRunSafely(github, run):
+    try:
+        return github.findDispatchedRun(run['repo'], run['workflowId'], run['since'])
+    except (GitHubAPIError, requests.exceptions.RequestException) as e:
+        logger.debug(f"Find workflow run of {run['repo']} failed: {e}")
+        return None
+
+def trackWorkflowRuns(github, runs, timeout):
+    """在同一个轮询循环里跟踪所有运行，直到全部结束或超时
+
+    尚未拿到运行ID的项目并发查询运行列表，已拿到的通过一次GraphQL批量查询状态；
+    有状态变化时缩短轮询间隔，否则逐步拉长到60秒。
+    """
+    interval = 5
+    deadline = time.monotonic() + timeout
+    while True:
+        active = [run for run in runs if not run['conclusion']]
+        if not active or time.monotonic() > deadline:
+            break
+        changed = False
+
+        pending = [run for run in active if not run['nodeId']]
+        if pending:
+            with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+                found = list(executor.map(lambda run: findRunSafely(github, run), pending))
+            for run, item in zip(pending, found):
+                if item:
+                    run['nodeId'] = item['node_id']
+                    run['url'] = item['html_url']
+                    run['status'] = item['status']
+                    changed = True
+                    logger.info(f"{run['repo']}: workflow run {item['id']} {item['status']}")
+
+        tracked = [run for run in active if run['nodeId']]
+        if tracked:
+            try:
+                statuses = github.workflowRunsStatus([run['nodeId'] for run in tracked])
+            except (GitHubAPIError, requests.exceptions.RequestException) as e:
+                logger.warning(f"Query workflow runs failed: {e}")
+                statuses = {}
+            for run in tracked:
+                node = statuses.get(run['nodeId'])
+                if not node:
+                    continue
+                checkSuite = node.get('checkSuite') or {}
+                status = (checkSuite.get('status') or '').lower()
+                run['createdAt'] = node['createdAt']
+                run['updatedAt'] = node['updatedAt']
+                if status and status != run['status']:
+                    changed = True
+                    run['status'] = status
+                    if status == 'completed':
+                        run['conclusion'] = (checkSuite.get('conclusion') or 'unknown').lower()
+                        logger.info(f"{run['repo']}: {run['conclusion']}")
+                    else:
+                        logger.info(f"{run['repo']}: {status}")
+
+        if all(run['conclusion'] for run in runs):
+            break
+        interval = 5 if changed else min(interval * 1.5, 60)
+        time.sleep(min(interval, max(0, deadline - time.monotonic())))
+
+    for run in runs:
+        if not run['conclusion']:
+            run['conclusion'] = 'timed_out'
+
+def formatRunDuration(run):
+    if not run['createdAt'] or not run['updatedAt'] or run['conclusion'] in ('timed_out', 'dispatch_failed'):
+        return '-'
+    start = datetime.fromisoformat(run['createdAt'].replace('Z', '+00:00'))
+    end = datetime.fromisoformat(run['updatedAt'].replace('Z', '+00:00'))
+    seconds = int((end - start).total_seconds())
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+def bulkRelease():
+    """并发触发packages文件中所有项目（或--wait时的单个项目）的Auto Release workflow，跟踪运行直到结束并汇总结果"""
+    github = getGitHubClient()
+    if not github:
+        logger.error("Bulk release needs a GitHub token to track workflow runs")
+        logger.error("Please run: gh auth login")
+        raise SystemExit(1)
+
+    if argsInfo.configFile:
+        try:
+            projects = loadConfigProjects(argsInfo.configFile)
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            raise SystemExit(1)
+    else:
+        projects = [{'org': argsInfo.projectOrg, 'name': argsInfo.projectName, 'branch': argsInfo.projectBranch}]
+    if not projects:
+        logger.warning("No projects to release")
+        return
+
+    with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+        runs = list(executor.map(lambda project: dispatchRelease(github, project), projects))
+
+    trackWorkflowRuns(github, runs, argsInfo.timeout * 60)
+
+    print(f"\n{'Repository':<40} {'Conclusion':<16} {'Duration':<10} URL")
+    for run in runs:
+        print(f"{run['repo']:<40} {run['conclusion']:<16} {formatRunDuration(run):<10} {run['url']}")
+
+    if any(run['conclusion'] != 'success' for run in runs):
+        raise SystemExit(1)
+
+def findPullRequestSafely(github, repo, head):
+    try:
+        return github.findPullRequest(repo, head)
+    except (GitHubAPIError, requests.exceptions.RequestException) as e:
+        logger.error(f"Find pull request of {repo} failed: {e}")
+        return None
+
+def evaluatePullRequest(node):
+    """根据PR状态判断: merged / closed / red / green / pending，返回(状态, 原因)"""
+    if node['state'] == 'MERGED':
+        return 'merged', ''
+    if node['state'] == 'CLOSED':
+        return 'closed', 'pull request closed'
+    if node.get('mergeable') == 'CONFLICTING':
+        return 'red', 'merge conflict'
+    if node.get('reviewDecision') == 'CHANGES_REQUESTED':
+        return 'red', 'changes requested'
+
+    commits = (node.get('commits') or {}).get('nodes') or []
+    rollup = commits[0]['commit'].get('statusCheckRollup') if commits else None
+    checkState = (rollup or {}).get('state')
+    if checkState in ('FAILURE', 'ERROR'):
+        return 'red', f"checks {checkState.lower()}"
+    if checkState not in (None, 'SUCCESS'):
+        return 'pending', 'checks running'
+    if node.get('reviewDecision') == 'REVIEW_REQUIRED':
+        return 'pending', 'review required'
+    if node.get('mergeable') == 'UNKNOWN':
+        return 'pending', 'mergeability unknown'
+    return 'green', ''
+
+def mergeQueue():
+    """合并队列：同时跟踪一组dev-changelog PR的检查和评审状态，变绿后立即合并
+
+    每轮通过一次GraphQL请求查询全部PR，没有变化时轮询间隔逐步拉长（退避），
+    变红、被关闭或超时的PR在最后汇总报告。
+    """
+    github = getGitHubClient()
+    if not github:
+        logger.error("merge --wait needs a GitHub token to poll pull requests")
+        logger.error("Please run: gh auth login")
+        raise SystemExit(1)
+
+    if argsInfo.configFile:
+        try:
+            projects = loadConfigProjects(argsInfo.configFile)
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            raise SystemExit(1)
+    else:
+        projects = [{'org': argsInfo.projectOrg, 'name': argsInfo.projectName, 'branch': argsInfo.projectBranch}]
+
+    head = f"{argsInfo.githubID}:dev-changelog"
+    repos = [f"{project['org']}/{project['name']}" for project in projects]
+    with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+        pulls = list(executor.map(lambda repo: findPullRequestSafely(github, repo, head), repos))
+
+    entries = []
+    for repo, pr in zip(repos, pulls):
+        entry = {'repo': repo, 'nodeId': None, 'number': None, 'url': '', 'result': None, 'reason': ''}
+        if pr:
+            entry.update(nodeId=pr['node_id'], number=pr['number'], url=pr['html_url'])
         else:
-            # 获取所有仓库
-            jq_filter = '.[] | {name: .name, pushedAt: .pushedAt, url: .url}'
-
-        # 构建gh命令
-        gh_cmd = [
-            "gh", "repo", "list", org,
-            "--limit", "100",
-            "--json", "name,pushedAt,url",
-            "--jq", jq_filter
-        ]
-        
-        # 执行gh命令
+            entry.update(result='no_pr', reason=f"no open pull request from {head}")
+        entries.append(entry)
+
+    interval = 10
+    deadline = time.monotonic() + (argsInfo.timeout * 60 if argsInfo.wait else 0)
+    while True:
+        active = [entry for entry in entries if not entry['result']]
+        if not active:
+            break
+        changed = False
+        try:
+            statuses = github.pullRequestsStatus([entry['nodeId'] for entry in active])
+        except (GitHubAPIError, requests.exceptions.RequestException) as e:
+            logger.warning(f"Query pull requests failed: {e}")
+            statuses = {}
+
+        for entry in active:
+            node = statuses.get(entry['nodeId'])
+            if not node:
+                continue
+            state, reason = evaluatePullRequest(node)
+            if state == 'green':
+                try:
+                    github.mergePullRequest(entry['repo'], entry['number'])
+                    entry.update(result='merged', reason='')
+                    changed = True
+                    logger.info(f"✅ Merged {entry['url']}")
+                except GitHubAPIError as e:
+                    # 405表示暂时不可合并（如分支保护仍在计算），下一轮重试
+                    if e.status != 405:
+                        entry.update(result='failed', reason=e.message)
+                        changed = True
+                        logger.error(f"Failed to merge {entry['url']}: {e.message}")
+                    else:
+                        entry['reason'] = e.message
+            elif state in ('merged', 'closed', 'red'):
+                entry.update(result=state if state != 'red' else 'failed', reason=reason)
+                changed = True
+                if state == 'red':
+                    logger.error(f"❌ {entry['url']}: {reason}")
+            elif reason != entry['reason']:
+                entry['reason'] = reason
+                changed = True
+                logger.info(f"{entry['repo']}: {reason}")
+
+        if all(entry['result'] for entry in entries) or time.monotonic() >= deadline:
+            break
+        interval = 10 if changed else min(interval * 1.5, 120)
+        time.sleep(min(interval, max(0, deadline - time.monotonic())))
+
+    for entry in entries:
+        if not entry['result']:
+            entry['result'] = 'timed_out' if argsInfo.wait else 'pending'
+
+    print(f"\n{'Repository':<40} {'Result':<10} {'Reason':<30} URL")
+    for entry in entries:
+        print(f"{entry['repo']:<40} {entry['result']:<10} {entry['reason']:<30} {entry['url']}")
+
+    if any(entry['result'] != 'merged' for entry in entries):
+        raise SystemExit(1)
+
+REPO_INDEX_DIR = "~/.cache/dev-tool/repo-index"
+REPO_INDEX_REFRESH_SECONDS = 600 # 索引超过该时间后做一次增量同步
+REPO_INDEX_FULL_SYNC_SECONDS = 86400 # 索引超过该时间后做一次全量同步（处理删除和重命名的仓库）
+
+def fetchOrgReposPage(org, page):
+    """通过GitHub API按推送时间倒序获取组织仓库的一页数据"""
+    query = f"per_page=100&page={page}&sort=pushed&direction=desc"
+    github = getGitHubClient()
+    if github:
+        try:
+            return github.request("GET", f"orgs/{org}/repos?type=all&{query}")
+        except GitHubAPIError as e:
+            if e.status != 404:
+                raise
+            # 不是组织时按用户仓库查询
+            return github.request("GET", f"users/{org}/repos?type=owner&{query}")
+
+    result = subprocess.run(
+        ["gh", "api", f"orgs/{org}/repos?type=all&{query}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0 and "not found" in result.stderr.lower():
+        # 不是组织时按用户仓库查询
         result = subprocess.run(
-            gh_cmd,
+            ["gh", "api", f"users/{org}/repos?type=owner&{query}"],
             capture_output=True,
-            text=True,
-            check=True
+            text=True
         )
-        
-        # 解析输出
-        repos = []
-        for line in result.stdout.strip().split('\n'):
-            if line.strip():
-                try:
-                    repo_data = json.loads(line)
-                    repos.append(repo_data)
-                except json.JSONDecodeError:
-                    continue
-        
-        if not repos:
-            return
-        
-        # 按更新时间排序（最新的在前）
-        repos.sort(key=lambda x: x['pushedAt'], reverse=True)
-        
-        # 直接输出结果，不显示总结信息
-        for repo in repos:
-            name = repo['name']
-            
-            if argsInfo.quiet:
-                # 静默模式，只输出项目名称
-                print(name)
-            else:
-                # 正常模式，输出时间和项目名称
-                pushed_at = repo['pushedAt']
-                # 格式化日期
-                try:
-                    from datetime import datetime
-                    # 解析UTC时间并转换为本地时间
-                    dt = datetime.fromisoformat(pushed_at.replace('Z', '+00:00'))
-                    # 转换为本地时间
-                    local_dt = dt.astimezone()
-                    formatted_date = local_dt.strftime('%Y-%m-%d %H:%M')
-                except:
-                    formatted_date = pushed_at[:16].replace('T', ' ')
-                
-                print(f"{formatted_date:<20} {name:<20} {repo['url']}")
-        
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, "gh api", result.stdout, result.stderr)
+    return json.loads(result.stdout or "[]")
+
+def syncRepoIndex(org, full=False):
+    """同步组织的本地仓库索引
+
+    首次或全量同步时分页读取所有仓库；增量同步时按推送时间倒序读取，
+    遇到不晚于索引中最新推送时间的仓库即停止，通常只需要一次请求。
+    """
+    indexPath = os.path.join(os.path.expanduser(REPO_INDEX_DIR), f"{org}.json")
+    index = None
+    if os.path.exists(indexPath):
+        try:
+            with open(indexPath) as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            index = None
+
+    now = time.time()
+    if index and not full:
+        age = now - index.get('syncedAt', 0)
+        if age < REPO_INDEX_REFRESH_SECONDS:
+            return index['repos']
+        full = now - index.get('fullSyncedAt', 0) >= REPO_INDEX_FULL_SYNC_SECONDS
+    full = full or not index
+
+    repos = {} if full else {repo['name']: repo for repo in index['repos']}
+    watermark = "" if full else max((repo['pushedAt'] or "" for repo in repos.values()), default="")
+    page = 1
+    while True:
+        items = fetchOrgReposPage(org, page)
+        reachedWatermark = False
+        for item in items:
+            pushedAt = item.get('pushed_at') or ""
+            if not full and pushedAt <= watermark:
+                reachedWatermark = True
+                continue
+            repos[item['name']] = {
+                'name': item['name'],
+                'pushedAt': pushedAt,
+                'url': item.get('html_url', ''),
+                'defaultBranch': item.get('default_branch', ''),
+                'archived': item.get('archived', False)
+            }
+        if reachedWatermark or len(items) < 100:
+            break
+        page += 1
+    logger.debug(f"Synced repo index of {org} ({'full' if full else 'incremental'}, {page} page(s), {len(repos)} repos)")
+
+    index = {
+        'org': org,
+        'syncedAt': now,
+        'fullSyncedAt': now if full else index.get('fullSyncedAt', 0),
+        'repos': sorted(repos.values(), key=lambda x: x['pushedAt'], reverse=True)
+    }
+    os.makedirs(os.path.dirname(indexPath), exist_ok=True)
+    tmpPath = indexPath + ".tmp"
+    with open(tmpPath, 'w') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmpPath, indexPath)
+    return index['repos']
+
+def isSubsequence(query, text):
+    """query的字符是否按顺序出现在text中，用于模糊匹配，如dtkwgt匹配dtkwidget"""
+    it = iter(text)
+    return all(ch in it for ch in query)
+
+def matchRepos(repos, query):
+    """大小写不敏感的模糊匹配：先是子串/正则匹配，其次是按字符顺序的模糊匹配，各自按推送时间排序"""
+    if not query:
+        return list(repos)
+    lowered = query.lower()
+    try:
+        pattern = re.compile(query, re.IGNORECASE)
+    except re.error:
+        pattern = None
+
+    direct = []
+    fuzzy = []
+    for repo in repos:
+        name = repo['name']
+        if (pattern.search(name) if pattern else lowered in name.lower()):
+            direct.append(repo)
+        elif isSubsequence(lowered, name.lower()):
+            fuzzy.append(repo)
+    return direct + fuzzy
+
+def searchProjects():
+    """搜索GitHub组织下的项目，支持模糊搜索并按更新时间排序"""
+    org = argsInfo.projectOrg
+    try:
+        repos = syncRepoIndex(org, full=argsInfo.refreshIndex)
     except subprocess.CalledProcessError as e:
-        if "authentication required" in e.stderr.lower() or "not logged in" in e.stderr.lower():
+        stderr = (e.stderr or "").lower()
+        if "authentication" in stderr or "not logged in" in stderr or "gh auth login" in stderr:
             logger.error("Not logged in to GitHub")
             logger.error("Please run: gh auth login")
-        elif "organization not found" in e.stderr.lower():
+        elif "not found" in stderr:
             logger.error(f"Organization '{org}' not found or not accessible")
         else:
             logger.error(f"GitHub CLI error: {e.stderr}")
         raise SystemExit(1)
+    except GitHubAPIError as e:
+        if e.status == 401:
+            logger.error("GitHub token is invalid or expired")
+            logger.error("Please run: gh auth login")
+        elif e.status == 404:
+            logger.error(f"Organization '{org}' not found or not accessible")
+        else:
+            logger.error(f"GitHub API error: {e.message}")
+        raise SystemExit(1)
     except Exception as e:
         logger.error(f"Unexpected error in searchProjects: {str(e)}")
         raise SystemExit(1)
 
+    # 直接输出结果，不显示总结信息
+    for repo in matchRepos(repos, argsInfo.projectName):
+        name = repo['name']
+
+        if argsInfo.quiet:
+            # 静默模式，只输出项目名称
+            print(name)
+        else:
+            # 正常模式，输出时间和项目名称
+            pushed_at = repo['pushedAt']
+            # 格式化日期
+            try:
+                # 解析UTC时间并转换为本地时间
+                dt = datetime.fromisoformat(pushed_at.replace('Z', '+00:00'))
+                # 转换为本地时间
+                local_dt = dt.astimezone()
+                formatted_date = local_dt.strftime('%Y-%m-%d %H:%M')
+            except:
+                formatted_date = pushed_at[:16].replace('T', ' ')
+
+            print(f"{formatted_date:<20} {name:<20} {repo['url']}")
+
+def lsRemoteRefs(org, name, branch, repoDir=None):
+    """通过git ls-remote获取分支HEAD和标签指向的提交，不需要本地克隆
+
+    指定repoDir时查询该仓库的origin远程。
+    """
+    remote = "origin" if repoDir else f"https://github.com/{org}/{name}.git"
+    result = subprocess.run(
+        ["git", "ls-remote", remote, f"refs/heads/{branch}", "refs/tags/*"],
+        cwd=repoDir,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env=dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git ls-remote exited with {result.returncode}")
+
+    headSha = None
+    tags = {}
+    peeled = {}
+    for line in result.stdout.splitlines():
+        sha, _, ref = line.partition('\t')
+        if ref == f"refs/heads/{branch}":
+            headSha = sha
+        elif ref.startswith("refs/tags/"):
+            tag = ref[len("refs/tags/"):]
+            # 附注标签的^{}行才是标签指向的提交
+            if tag.endswith("^{}"):
+                peeled[tag[:-3]] = sha
+            else:
+                tags[tag] = sha
+    tags.update(peeled)
+    return headSha, tags
+
+def versionSortKey(tag):
+    """版本号排序键，只识别形如1.2.3或v1.2.3的标签"""
+    match = re.match(r'^v?(\d+(?:\.\d+)*)$', tag)
+    if not match:
+        return None
+    return tuple(int(part) for part in match.group(1).split('.'))
+
+def latestVersionTag(tags):
+    """从标签列表中选出版本号最大的标签"""
+    versions = [(versionSortKey(tag), tag) for tag in tags if versionSortKey(tag) is not None]
+    if not versions:
+        return None
+    return max(versions)[1]
+
+def compareAheadBy(org, name, base, head):
+    """通过GitHub compare接口获取head领先base的提交数"""
+    github = getGitHubClient()
+    if github:
+        return github.request("GET", f"repos/{org}/{name}/compare/{base}...{head}").get("ahead_by", 0)
+
+    result = subprocess.run(
+        ["gh", "api", f"repos/{org}/{name}/compare/{base}...{head}", "--jq", ".ahead_by"],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return int(result.stdout.strip() or 0)
+
+def scanRepoStatus(project):
+    """获取单个仓库的最新标签、HEAD提交和领先提交数"""
+    org, name, branch = project['org'], project['name'], project['branch']
+    status = {'org': org, 'name': name, 'branch': branch, 'lastTag': None, 'headSha': None, 'ahead': None, 'error': None}
+    try:
+        headSha, tags = lsRemoteRefs(org, name, branch)
+        if not headSha:
+            raise RuntimeError(f"branch {branch} not found")
+        status['headSha'] = headSha
+        lastTag = latestVersionTag(tags)
+        status['lastTag'] = lastTag
+        if lastTag is None:
+            return status
+        if tags[lastTag] == headSha:
+            # HEAD就是最新标签，不需要访问GitHub API
+            status['ahead'] = 0
+        else:
+            status['ahead'] = compareAheadBy(org, name, tags[lastTag], headSha)
+    except Exception as e:
+        status['error'] = str(e)
+    return status
+
+def loadConfigProjects(configFile):
+    """读取packages文件中的项目列表，补全org和branch默认值"""
+    with open(find_config_file(configFile)) as f:
+        config = json.load(f)
+    defaults = config.get('defaults', {})
+    return [{
+        'org': project.get('org', defaults.get('org', argsInfo.projectOrg)),
+        'name': project.get('name', defaults.get('name')),
+        'branch': project.get('branch', defaults.get('branch', argsInfo.projectBranch))
+    } for project in config.get('projects', [])]
+
+def loadScanProjects():
+    """确定outdated扫描的项目：packages文件、指定项目或整个组织"""
+    if argsInfo.configFile:
+        return loadConfigProjects(argsInfo.configFile)
+
+    if argsInfo.projectName:
+        return [{'org': argsInfo.projectOrg, 'name': argsInfo.projectName, 'branch': argsInfo.projectBranch}]
+
+    repos = syncRepoIndex(argsInfo.projectOrg, full=argsInfo.refreshIndex)
+    return [{
+        'org': argsInfo.projectOrg,
+        'name': repo['name'],
+        'branch': repo.get('defaultBranch') or argsInfo.projectBranch
+    } for repo in repos if not repo.get('archived')]
+
+def scanOutdated():
+    """不克隆仓库，并发检查各仓库自最新标签以来是否有新提交"""
+    try:
+        projects = loadScanProjects()
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to list repositories of {argsInfo.projectOrg}: {e.stderr}")
+        raise SystemExit(1)
+    except GitHubAPIError as e:
+        logger.error(f"Failed to list repositories of {argsInfo.projectOrg}: {e.message}")
+        raise SystemExit(1)
+
+    if not projects:
+        logger.warning("No projects to scan")
+        return
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+        results = list(executor.map(scanRepoStatus, projects))
+    logger.debug(f"Scanned {len(results)} repositories in {time.monotonic() - start:.2f}s")
+
+    hasError = False
+    for status in results:
+        if status['error']:
+            hasError = True
+            logger.error(f"{status['org']}/{status['name']}: {status['error']}")
+            continue
+        if argsInfo.quiet:
+            # 静默模式只输出有新提交的项目名称
+            if status['ahead']:
+                print(status['name'])
+            continue
+        lastTag = status['lastTag'] or '-'
+        ahead = '-' if status['ahead'] is None else status['ahead']
+        mark = ' *' if status['ahead'] else ''
+        print(f"{status['name']:<30} {status['branch']:<12} {lastTag:<12} {status['headSha'][:8]:<10} {ahead}{mark}")
+
+    if hasError:
+        raise SystemExit(1)
+
+PREFETCH_UNIT_NAME = "dev-tool-prefetch"
+
+def loadPrefetchProjects():
+    """确定prefetch的项目：指定的packages文件，否则为所有git packages文件中的项目和已缓存的仓库"""
+    if argsInfo.configFile:
+        return loadConfigProjects(argsInfo.configFile)
+
+    projects = {}
+    for path in sorted(glob.glob(os.path.expanduser('~/.config/dev-tool/packages/*.packages'))):
+        try:
+            with open(path) as f:
+                config = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skip {path}: {e}")
+            continue
+        # CRP的packages文件没有org，只预取git项目列表
+        if 'org' not in config.get('defaults', {}):
+            continue
+        for project in loadConfigProjects(path):
+            projects.setdefault(project['name'], project)
+
+    rootDir = os.path.expanduser(argsInfo.projectRootDir)
+    if os.path.isdir(rootDir):
+        for name in sorted(os.listdir(rootDir)):
+            if os.path.isdir(os.path.join(rootDir, name, ".git")):
+                projects.setdefault(name, {'org': argsInfo.projectOrg, 'name': name, 'branch': argsInfo.projectBranch})
+    return list(projects.values())
+
+def prefetchRepo(project):
+    """克隆或更新单个缓存仓库，并执行git maintenance优化"""
+    org, name = project['org'], project['name']
+    repoDir = os.path.join(os.path.expanduser(argsInfo.projectRootDir), name)
+    result = {'name': name, 'action': None, 'elapsed': 0, 'error': None}
+    start = time.monotonic()
+
+    def run(*cmd, cwd=repoDir):
+        subprocess.run(list(cmd), cwd=cwd, check=True, capture_output=True, text=True)
+
+    try:
+        if os.path.isdir(os.path.join(repoDir, ".git")):
+            with tracer.span("fetch", repo=name):
+                run("git", "fetch", "origin", "--prune")
+            result['action'] = 'fetched'
+        else:
+            # 与createOrUpdateRepo相同：克隆后添加fork远程并设置默认仓库
+            with tracer.span("clone", repo=name):
+                run("git", "clone", f"https://github.com/{org}/{name}.git", repoDir, cwd=None)
+                run("git", "remote", "add", "github", f"https://github.com/{argsInfo.githubID}/{name}.git")
+                run("gh", "repo", "set-default", f"{org}/{name}")
+            result['action'] = 'cloned'
+    except subprocess.CalledProcessError as e:
+        result['error'] = e.stderr.strip() if e.stderr else str(e)
+    except Exception as e:
+        result['error'] = str(e)
+
+    if not result['error']:
+        try:
+            with tracer.span("maintenance", repo=name):
+                # 之后每次fetch都顺带增量更新commit-graph，加速git describe
+                run("git", "config", "fetch.writeCommitGraph", "true")
+                run("git", "maintenance", "run", "--task=commit-graph", "--task=loose-objects", "--task=incremental-repack")
+                # git maintenance的pack-refs任务需要git 2.42+，直接调用以兼容旧版本
+                run("git", "pack-refs", "--all")
+        except subprocess.CalledProcessError as e:
+            # 优化失败不影响已经完成的fetch
+            logger.warning(f"{name}: git maintenance failed: {e.stderr.strip() if e.stderr else e}")
+    result['elapsed'] = time.monotonic() - start
+    return result
+
+def installPrefetchTimer():
+    """安装每小时执行一次prefetch的systemd用户定时器"""
+    unitDir = os.path.expanduser("~/.config/systemd/user")
+    os.makedirs(unitDir, exist_ok=True)
+
+    devTool = shutil.which("dev-tool") or os.path.expanduser("~/.local/bin/dev-tool")
+    command = f"{devTool} git prefetch --quiet"
+    if argsInfo.configFile:
+        command += f" --config {os.path.abspath(find_config_file(argsInfo.configFile))}"
+
+    units = {
+        f"{PREFETCH_UNIT_NAME}.service": textwrap.dedent(f"""\
+            [Unit]
+            Description=Prefetch and optimize dev-tool git repositories
+            Wants=network-online.target
+            After=network-online.target
+
+            [Service]
+            Type=oneshot
+            ExecStart={command}
+            Nice=10
+            IOSchedulingClass=idle
+            """),
+        f"{PREFETCH_UNIT_NAME}.timer": textwrap.dedent("""\
+            [Unit]
+            Description=Run dev-tool git prefetch hourly
+
+            [Timer]
+            OnCalendar=hourly
+            RandomizedDelaySec=300
+            Persistent=true
+
+            [Install]
+            WantedBy=timers.target
+            """)
+    }
+    for fileName, content in units.items():
+        with open(os.path.join(unitDir, fileName), 'w') as f:
+            f.write(content)
+        logger.debug(f"Wrote {os.path.join(unitDir, fileName)}")
+
+    try:
+        subprocess.run(["systemctl", "--user", "daemon-reload"], check=True, capture_output=True, text=True)
+        subprocess.run(["systemctl", "--user", "enable", "--now", f"{PREFETCH_UNIT_NAME}.timer"],
+                       check=True, capture_output=True, text=True)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        message = e.stderr.strip() if getattr(e, 'stderr', None) else str(e)
+        logger.error(f"Failed to enable {PREFETCH_UNIT_NAME}.timer: {message}")
+        raise SystemExit(1)
+    logger.info(f"✅ Installed {PREFETCH_UNIT_NAME}.timer, check it with: systemctl --user list-timers {PREFETCH_UNIT_NAME}.timer")
+
+def prefetchRepos():
+    """并发克隆或更新packages文件中的所有仓库，让后续的tag命令从已更新、已优化的仓库开始"""
+    if argsInfo.installTimer:
+        installPrefetchTimer()
+        return
+
+    try:
+        projects = loadPrefetchProjects()
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+    if not projects:
+        logger.warning("No projects to prefetch")
+        return
+
+    os.makedirs(os.path.expanduser(argsInfo.projectRootDir), exist_ok=True)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=argsInfo.jobs) as executor:
+        results = list(executor.map(prefetchRepo, projects))
+
+    hasError = False
+    for result in results:
+        if result['error']:
+            hasError = True
+            logger.error(f"{result['name']}: {result['error']}")
+        elif not argsInfo.quiet:
+            print(f"{result['name']:<30} {result['action']:<8} {result['elapsed']:.1f}s")
+    logger.info(f"Prefetched {len(results)} repositories in {time.monotonic() - start:.1f}s")
+
+    if hasError:
+        raise SystemExit(1)
+
 def createOrUpdateRepo():
     dir = os.path.expanduser(argsInfo.projectRootDir)
     if not os.path.exists(dir):
@@ -564,15 +1997,55 @@ def createOrUpdateRepo():
     os.chdir(dir)
 
     if not os.path.exists(dir + "/" + argsInfo.projectName):
-        createRepo()
-        os.chdir(argsInfo.projectName)
-        initRepo()
+        with tracer.span("clone"):
+            createRepo()
+            os.chdir(argsInfo.projectName)
+            initRepo()
     else:
         os.chdir(argsInfo.projectName)
 
+def runCommand(args):
+    """按命令类型分发执行"""
+    if (args.command == 'release' and (argsInfo.configFile or argsInfo.wait)):
+        # 指定packages文件或--wait时触发并跟踪workflow运行直到结束
+        bulkRelease()
+    elif (args.command == 'release'):
+        # release命令不需要createOrUpdateRepo，直接执行
+        runRelease()
+    elif (args.command == 'projects'):
+        # projects命令不需要createOrUpdateRepo，直接搜索项目
+        searchProjects()
+    elif (args.command == 'merge' and (argsInfo.wait or argsInfo.configFile)):
+        # 合并队列只访问GitHub API，不需要本地仓库
+        mergeQueue()
+    elif (args.command == 'test'):
+        # test命令只根据引用生成预览，不修改本地仓库
+        previewTags()
+    elif (args.command == 'tag' and argsInfo.cloneless and getGitHubClient()):
+        # cloneless模式只通过GitHub API操作，不需要本地仓库
+        clonelessTagPR(getGitHubClient())
+    elif (args.command == 'prefetch'):
+        # prefetch命令直接管理projectRootDir下的所有缓存仓库
+        prefetchRepos()
+    elif (args.command == 'outdated'):
+        # outdated命令只访问远程引用和GitHub API，不需要本地仓库
+        scanOutdated()
+    else:
+        if (args.command == 'tag' and argsInfo.cloneless):
+            logger.warning("No GitHub token available, falling back to clone mode")
+        createOrUpdateRepo()
+        if (args.command == 'merge'):
+            mergePR()
+        elif (args.command == 'lasttag'):
+            lastTag = resolveLastTag()
+            logger.info(f"Last Tag: {lastTag}")
+        else:
+            initTagPR()
+            createTagPR()
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Pack for CRP.')
-    parser.add_argument('command', nargs='?', default='tag', choices=['tag', 'merge', 'test', 'lasttag', 'release', 'projects'], help='The command type (list or pack)')
+    parser.add_argument('command', nargs='?', default='tag', choices=['tag', 'merge', 'test', 'lasttag', 'release', 'projects', 'outdated', 'prefetch'], help='The command type (list or pack)')
 
     parser.add_argument('--dir', type=str, default=None, help='The project directory')
     parser.add_argument('--org', type=str, default=None, help='The project organization, e.g: linuxdeepin')
@@ -582,6 +2055,14 @@ def main(argv):
     parser.add_argument('--reviewer', type=str, default=[], nargs='+', help='The project reviewers')
     parser.add_argument('--verbose', action='store_true', help='Show verbose output for git operations')
     parser.add_argument('--quiet', action='store_true', help='Show brief output results')
+    parser.add_argument('--config', type=str, default=None, help='The packages file to process (outdated, release, merge, test and prefetch commands)')
+    parser.add_argument('--jobs', type=int, default=16, help='Number of repositories scanned concurrently')
+    parser.add_argument('--refresh', action='store_true', help='Force a full sync of the local repository index')
+    parser.add_argument('--timeout', type=int, default=60, help='Minutes to wait for workflow runs or pull request checks')
+    parser.add_argument('--wait', action='store_true', help='merge: wait for checks and reviews, then merge once green; release: wait for the workflow run to finish')
+    parser.add_argument('--cloneless', action='store_true', help='Create the tag PR through the GitHub API without a local clone')
+    parser.add_argument('--install-timer', action='store_true', help='Install a systemd user timer that runs prefetch hourly')
+    parser.add_argument('--trace', type=str, default=None, help='Write a Chrome trace-event JSON of subprocess calls and phases to this file')
 
     if "DEBEMAIL" not in os.environ:
         os.environ["DEBEMAIL"] = argsInfo.debEmail
@@ -590,8 +2071,8 @@ def main(argv):
 
     if (args.name is not None):
         argsInfo.projectName = args.name
-    elif (args.command == 'projects'):
-        # projects命令如果没有提供name参数，则清空搜索关键词
+    elif (args.command in ('projects', 'outdated')):
+        # projects命令如果没有提供name参数，则清空搜索关键词；outdated命令则扫描整个组织
         argsInfo.projectName = ""
     if (args.branch is not None):
         argsInfo.projectBranch = args.branch
@@ -608,36 +2089,25 @@ def main(argv):
         argsInfo.projectReviewers = reviewers
     argsInfo.verbose = args.verbose
     argsInfo.quiet = args.quiet
+    argsInfo.configFile = args.config
+    argsInfo.jobs = max(1, args.jobs)
+    argsInfo.refreshIndex = args.refresh
+    argsInfo.timeout = args.timeout
+    argsInfo.wait = args.wait
+    argsInfo.cloneless = args.cloneless
+    argsInfo.installTimer = args.install_timer
 
-    if (args.command == 'release'):
-        # release命令不需要createOrUpdateRepo，直接执行
-        runRelease()
-    elif (args.command == 'projects'):
-        # projects命令不需要createOrUpdateRepo，直接搜索项目
-        searchProjects()
-    else:
-        createOrUpdateRepo()
-        if (args.command == 'merge'):
-            mergePR()
-        elif (args.command == 'test'):
-            initTagPR()
-            try:
-                diff_result = subprocess.run(
-                    "git diff HEAD^ HEAD | cat",
-                    shell=True,
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-                print(diff_result.stdout)
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to show diff: {e.stderr}")
-        elif (args.command == 'lasttag'):
-            lastTag = fetchLastTag()
-            logger.info(f"Last Tag: {lastTag}")
-        else:
-            initTagPR()
-            createTagPR()
+    if (args.trace is not None):
+        argsInfo.traceFile = args.trace
+        tracer.enable()
+
+    try:
+        with tracer.span(f"git {args.command}", project=argsInfo.projectName):
+            runCommand(args)
+    finally:
+        if argsInfo.traceFile:
+            tracer.write(argsInfo.traceFile)
+            logger.info(f"Trace written to {argsInfo.traceFile}, open it in chrome://tracing or https://ui.perfetto.dev")
 
 if(__name__=="__main__"):
     main(sys.argv)
@@ -115,13 +115,15 @@ else
 fi
 
 # 安装脚本到用户目录
-chmod +x ./dev-tool ./deepin-iconfinder ./package-crp.py ./git-tag.py ./batch-git-tag.py ./batch-package-crp.py ./gen-crp-pwd.py
+chmod +x ./dev-tool ./deepin-iconfinder ./package-crp.py ./git-tag.py ./batch-git-tag.py ./batch-package-crp.py ./release-train.py ./gen-crp-pwd.py
 cp ./dev-tool "$USER_BIN/dev-tool"
 cp ./deepin-iconfinder "$USER_BIN/deepin-iconfinder"
 cp ./package-crp.py "$USER_BIN/package-crp.py"
 cp ./git-tag.py "$USER_BIN/git-tag.py"
 cp ./batch-git-tag.py "$USER_BIN/batch-git-tag.py"
 cp ./batch-package-crp.py "$USER_BIN/batch-package-crp.py"
+cp ./release-train.py "$USER_BIN/release-train.py"
+cp ./batch_common.py "$USER_BIN/batch_common.py"
 cp ./gen-crp-pwd.py "$USER_BIN/gen-crp-pwd.py"
 
 # 安装自动补全脚本到用户目录
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+from batch_common import get_project_name, get_project_keys, build_dependency_graph, find_config_file
+
+# 发布列车的阶段，每个项目按顺序经过这些阶段，不同项目之间互不等待
+STAGES = ['tag', 'merge', 'release', 'pack']
+STAGE_LABELS = {'tag': 'Tag PR', 'merge': 'Merge', 'release': 'Release', 'pack': 'CRP Pack'}
+STATE_MARKS = {'pending': '·', 'waiting': '…', 'running': '▶', 'success': '✓', 'failed': '✗', 'skipped': '-'}
+
+class TrainProject:
+    """单个项目在发布列车中的状态"""
+
+    def __init__(self, key: str, project: Dict, defaults: Dict):
+        self.key = key  # 依赖关系和进度显示中的标识，同名项目为 名称@分支
+        self.name = get_project_name(project, defaults)
+        self.project = project
+        self.defaults = defaults
+        self.states = {stage: 'pending' for stage in STAGES}
+        self.started = {}
+        self.finished = {}
+        self.version = None
+        self.message = ''
+        self.logs = {}
+        self.packed = threading.Event()  # CRP打包阶段结束（无论成功与否），下游项目据此开始打包
+
+    def get(self, key: str, default=None):
+        return self.project.get(key, self.defaults.get(key, default))
+
+    def elapsed(self, stage: str) -> str:
+        if stage not in self.started:
+            return ''
+        seconds = int(self.finished.get(stage, time.monotonic()) - self.started[stage])
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class ProgressView:
+    """按阶段显示每个项目的进度：终端中原地刷新表格，否则在状态变化时逐行输出"""
+
+    def __init__(self, trains: List[TrainProject], stages: List[str]):
+        self.trains = trains
+        self.stages = stages
+        self.lock = threading.Lock()
+        self.live = sys.stdout.isatty()
+        self.lines = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def render(self) -> List[str]:
+        width = max(len(train.key) for train in self.trains) + 2
+        header = f"{'Project':<{width}}" + "".join(f"{STAGE_LABELS[stage]:<14}" for stage in self.stages) + "Version"
+        rows = [header]
+        for train in self.trains:
+            cells = []
+            for stage in self.stages:
+                state = train.states[stage]
+                cells.append(f"{STATE_MARKS[state]} {train.elapsed(stage) if state != 'skipped' else '':<12}")
+            rows.append(f"{train.key:<{width}}" + "".join(cells) + f"{train.version or '-':<10} {train.message}")
+        return rows
+
+    def redraw(self):
+        with self.lock:
+            rows = self.render()
+            if self.lines:
+                # 光标移回表格起始行并清除之后的内容
+                sys.stdout.write(f"\033[{self.lines}F\033[J")
+            sys.stdout.write("\n".join(rows) + "\n")
+            sys.stdout.flush()
+            self.lines = len(rows)
+
+    def update(self, train: TrainProject, stage: str):
+        """阶段状态变化时调用"""
+        if self.live:
+            self.redraw()
+            return
+        with self.lock:
+            line = f"[{train.key}] {STAGE_LABELS[stage]}: {train.states[stage]}"
+            if train.states[stage] in ('success', 'failed'):
+                line += f" ({train.elapsed(stage)})"
+            if train.message and train.states[stage] != 'success':
+                line += f" - {train.message}"
+            print(line, flush=True)
+
+    def start(self):
+        if not self.live:
+            return
+
+        def loop():
+            while not self.stopped.wait(1):
+                self.redraw()
+
+        self.redraw()
+        self.thread = threading.Thread(target=loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        if self.live:
+            self.redraw()
+        else:
+            print("\n".join(self.render()))
+
+def topological_order(graph: Dict[str, List[str]]) -> List[str]:
+    """依赖在前的项目顺序，同一层级保持配置文件中的顺序"""
+    order, seen = [], set()
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in graph[name]:
+            visit(dep)
+        order.append(name)
+    for name in graph:
+        visit(name)
+    return order
+
+def build_stage_command(stage: str, train: TrainProject, args: argparse.Namespace) -> List[str]:
+    """生成每个阶段调用的dev-tool命令"""
+    if stage == 'pack':
+        cmd = ["dev-tool", "crp", "pack", "--topic", args.topic, "--name", train.get('crpName') or train.name]
+        if train.get('crpBranch'):
+            cmd.extend(["--branch", train.get('crpBranch')])
+        if train.version:
+            cmd.extend(["--tag", train.version])
+        return cmd
+
+    cmd = ["dev-tool", "git", stage, "--name", train.name]
+    for param in ('org', 'branch', 'dir'):
+        if train.get(param):
+            cmd.extend([f"--{param}", train.get(param)])
+    if stage == 'tag':
+        tag = args.tag or train.get('tag')
+        if tag:
+            cmd.extend(["--tag", tag])
+        for reviewer in train.get('reviewers', []):
+            cmd.extend(["--reviewer", reviewer])
+        cmd.append("--cloneless")
+    else:
+        cmd.extend(["--wait", "--timeout", str(args.timeout)])
+    return cmd
+
+def run_stage(stage: str, train: TrainProject, args: argparse.Namespace, log_dir: str) -> bool:
+    """执行单个阶段，输出写入日志文件"""
+    log_path = os.path.join(log_dir, f"{train.key.replace('/', '_')}-{stage}.log")
+    train.logs[stage] = log_path
+    cmd = build_stage_command(stage, train, args)
+    with open(log_path, 'w') as log:
+        log.write("$ " + " ".join(cmd) + "\n")
+        log.flush()
+        ok = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL).returncode == 0
+
+    if stage == 'tag' and ok:
+        # 记录本次生成的版本号，打包时作为tag
+        with open(log_path) as log:
+            match = re.search(r'Project Tag: (\S+)', log.read())
+        if match:
+            train.version = match.group(1)
+    return ok
+
+def run_train(train: TrainProject, stages: List[str], trains: Dict[str, TrainProject],
+              graph: Dict[str, List[str]], args: argparse.Namespace, view: ProgressView, log_dir: str):
+    """项目依次经过各阶段；CRP打包前等待依赖项目打包结束，依赖失败时跳过"""
+    def finish(stage, state, message=''):
+        train.states[stage] = state
+        train.finished[stage] = time.monotonic()
+        train.message = message
+        view.update(train, stage)
+
+    try:
+        for index, stage in enumerate(stages):
+            if stage == 'pack' and graph[train.key]:
+                train.states[stage] = 'waiting'
+                view.update(train, stage)
+                for dep in graph[train.key]:
+                    trains[dep].packed.wait()
+                broken = [dep for dep in graph[train.key] if trains[dep].states['pack'] != 'success']
+                if broken:
+                    for rest in stages[index:]:
+                        train.states[rest] = 'skipped'
+                    train.message = f"依赖项目 {', '.join(broken)} 未成功"
+                    view.update(train, stage)
+                    return
+
+            train.states[stage] = 'running'
+            train.started[stage] = time.monotonic()
+            train.message = ''
+            view.update(train, stage)
+            try:
+                ok = run_stage(stage, train, args, log_dir)
+            except Exception as e:
+                ok = False
+                train.message = str(e)
+            if not ok:
+                finish(stage, 'failed', train.message or "执行失败")
+                for rest in stages[index + 1:]:
+                    train.states[rest] = 'skipped'
+                return
+            finish(stage, 'success')
+    finally:
+        train.packed.set()
+
+def main():
+    parser = argparse.ArgumentParser(description='dev-tool train - 流水线执行标签PR、合并、Auto Release和CRP打包')
+    parser.add_argument('--config', required=True, help='packages配置文件路径')
+    parser.add_argument('--topic', help='CRP打包的主题名称')
+    parser.add_argument('--tag', help='所有项目使用的tag（默认根据上个标签自动递增）')
+    parser.add_argument('--jobs', type=int, default=8, help='同时在流水线中的最大项目数')
+    parser.add_argument('--timeout', type=int, default=60, help='等待PR检查或workflow运行的超时时间（分钟）')
+    parser.add_argument('--from', dest='first', default='tag', choices=STAGES, help='从哪个阶段开始（之前的阶段已手动完成）')
+    parser.add_argument('--until', dest='last', default='pack', choices=STAGES, help='执行到哪个阶段为止')
+    args = parser.parse_args()
+    args.jobs = max(1, args.jobs)
+
+    stages = STAGES[STAGES.index(args.first):STAGES.index(args.last) + 1]
+    if not stages:
+        print(f"错误: --from {args.first} 在 --until {args.last} 之后")
+        return 1
+    if 'pack' in stages and not args.topic:
+        print("错误: 执行CRP打包阶段需要指定 --topic（或使用 --until release）")
+        return 1
+
+    try:
+        config_path = find_config_file(args.config)
+        with open(config_path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"错误: 配置文件 {args.config} 不存在于以下路径: 当前目录, ~/.config/dev-tool/packages/, ~/.config/dev-tool/")
+        return 1
+    except json.JSONDecodeError:
+        print(f"错误: 配置文件 {config_path} 格式不正确")
+        return 1
+
+    defaults = config.get('defaults', {})
+    projects = config.get('projects', [])
+    if not projects:
+        print("警告: 配置文件中没有定义项目")
+        return 0
+
+    try:
+        graph = build_dependency_graph(projects, defaults)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+
+    trains = {key: TrainProject(key, project, defaults)
+              for key, project in zip(get_project_keys(projects, defaults), projects)}
+    for train in trains.values():
+        for stage in STAGES:
+            if stage not in stages:
+                train.states[stage] = 'skipped'
+
+    config_name = os.path.splitext(os.path.basename(config_path))[0]
+    log_dir = os.path.expanduser(f"~/.cache/dev-tool/train-logs/{config_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    os.makedirs(log_dir, exist_ok=True)
+    print(f"执行日志目录: {log_dir}")
+
+    view = ProgressView(list(trains.values()), STAGES)
+    view.start()
+    try:
+        # 按依赖顺序提交，等待依赖的项目所依赖的项目一定已经开始执行，不会占满线程池而死锁
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            for name in topological_order(graph):
+                executor.submit(run_train, trains[name], stages, trains, graph, args, view, log_dir)
+    finally:
+        view.stop()
+
+    failed = [train for train in trains.values()
+              if any(train.states[stage] in ('failed', 'skipped') for stage in stages)]
+    if failed:
+        print("\n未完成的项目:")
+        for train in failed:
+            stage = next(stage for stage in stages if train.states[stage] in ('failed', 'skipped'))
+            print(f"  {train.key:<30} {STAGE_LABELS[stage]}: {train.message} {train.logs.get(stage, '')}")
+        print("修复后可使用 --from 从失败的阶段重新执行")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash
+import json
+import queue
+import re
 import logging
 import os
 import sys
+import threading
 
 # 添加模块路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
@@ -9,6 +13,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 from modules.config_manager import config_manager
 from modules.crp_manager import crp_manager
 from modules.git_manager import git_manager
+from modules.response_cache import response_cache
+from modules.upstream_metrics import github_budget, upstream_metrics
+from modules.topic_watcher import TopicWatchHub
+from modules.pr_tracker import PRTracker
+from modules.job_queue import JobQueue
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -17,9 +26,30 @@ app = Flask(__name__)
 web_config = config_manager.get_web_config()
 app.config['SECRET_KEY'] = web_config.get('secret_key', 'dev-tool-web-secret-key')
 
-# 设置日志
+def fetch_topic_instances(topic_name):
+    """主题轮询器获取打包实例（后台线程中调用，需要自行确保已登录）"""
+    if not crp_manager.ensure_login():
+        raise RuntimeError('未登录CRP')
+    return crp_manager.fetch_instances(topic_name)
+
+# 每个主题一个共享的打包状态轮询器
+topic_watch_hub = TopicWatchHub(fetch_topic_instances, interval=web_config.get('instance_poll_interval', 10))
+
+# 每个SSE连接在整个生命周期内占用一个worker线程，限制并发连接数，为普通请求保留线程
+instance_stream_slots = threading.BoundedSemaphore(
+    int(web_config.get('max_instance_streams', max(1, int(web_config.get('threads', 8)) // 2))))
+
+# 所有页面共用的标签PR跟踪列表，GitHub额度紧张时暂停刷新
+pr_tracker = PRTracker(git_manager.get_tracked_pr_statuses,
+                       refresh_interval=web_config.get('pr_poll_interval', 30),
+                       throttle=git_manager.is_github_budget_low)
+
+# 批量打包等耗时操作在后台任务队列中执行
+job_queue = JobQueue(max_workers=web_config.get('job_workers', 2))
+
+# 设置日志，调试模式下输出DEBUG日志
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.DEBUG if web_config.get('debug', False) else logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
@@ -55,6 +85,8 @@ def api_crp_config():
         try:
             config_data = request.get_json()
             config_manager.update_crp_config(config_data)
+            for name in ('crp_topics', 'crp_projects', 'crp_instances'):
+                response_cache.invalidate(name)
             return jsonify({'success': True, 'message': 'CRP配置已保存'})
         except Exception as e:
             return jsonify({'success': False, 'message': f'保存失败: {str(e)}'})
@@ -79,6 +111,8 @@ def api_git_config():
         try:
             config_data = request.get_json()
             config_manager.update_git_config(config_data)
+            for name in ('git_repos', 'git_latest_tag'):
+                response_cache.invalidate(name)
             return jsonify({'success': True, 'message': 'Git配置已保存'})
         except Exception as e:
             return jsonify({'success': False, 'message': f'保存失败: {str(e)}'})
@@ -112,11 +146,14 @@ def api_crp_login():
 def api_crp_topics():
     """获取CRP主题列表"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
         topic_filter = request.args.get('filter', '')
-        topics = crp_manager.list_topics(topic_filter)
+        topics = response_cache.get_or_load(
+            'crp_topics', (crp_manager.user_name, topic_filter),
+            lambda: crp_manager.list_topics(topic_filter)
+        )
         return jsonify({'success': True, 'topics': topics})
     except Exception as e:
         app.logger.error(f"获取主题列表失败: {str(e)}")
@@ -129,19 +166,21 @@ def get_crp_projects():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
     
-    if not crp_manager.token:
-        if not crp_manager.login():
-            return jsonify({"success": False, "message": "未登录CRP"})
+    if not crp_manager.ensure_login():
+        return jsonify({"success": False, "message": "未登录CRP"})
     
-    result = crp_manager.list_projects(filter_name, page, per_page)
+    result = response_cache.get_or_load(
+        'crp_projects', (filter_name, page, per_page),
+        lambda: crp_manager.list_projects(filter_name, page, per_page),
+        should_cache=lambda result: bool(result.get('projects'))
+    )
     return jsonify({"success": True, **result})
 
 @app.route('/api/crp/projects/<int:project_id>/branches')
 def get_project_branches(project_id):
     """获取项目分支列表"""
-    if not crp_manager.token:
-        if not crp_manager.login():
-            return jsonify({"success": False, "message": "未登录CRP"})
+    if not crp_manager.ensure_login():
+        return jsonify({"success": False, "message": "未登录CRP"})
     
     branches = crp_manager.get_project_branches(project_id)
     return jsonify({"success": True, "branches": branches})
@@ -149,9 +188,8 @@ def get_project_branches(project_id):
 @app.route('/api/crp/commit/<project_name>')
 def get_project_commit_info(project_name):
     """获取项目提交信息"""
-    if not crp_manager.token:
-        if not crp_manager.login():
-            return jsonify({"success": False, "message": "未登录CRP"})
+    if not crp_manager.ensure_login():
+        return jsonify({"success": False, "message": "未登录CRP"})
     
     commit_info = crp_manager.get_latest_commit(project_name)
     return jsonify({"success": True, "commit": commit_info})
@@ -179,7 +217,7 @@ def api_crp_config_info():
 def api_crp_status():
     """获取CRP连接状态"""
     try:
-        is_connected = bool(crp_manager.token)
+        is_connected = crp_manager.ensure_login()
         user_name = crp_manager.user_name if is_connected else None
         
         return jsonify({
@@ -194,19 +232,54 @@ def api_crp_status():
 def api_crp_instances(topic_name):
     """获取主题下的打包实例列表"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
-        instances = crp_manager.list_instances(topic_name)
+        instances = response_cache.get_or_load(
+            'crp_instances', topic_name,
+            lambda: crp_manager.list_instances(topic_name)
+        )
         return jsonify({'success': True, 'instances': instances})
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取打包列表失败: {str(e)}'})
 
+@app.route('/api/crp/instances/<topic_name>/stream')
+def api_crp_instances_stream(topic_name):
+    """通过Server-Sent Events推送主题下打包实例的构建状态变化"""
+    # 超过本worker允许的连接数时拒绝，页面退回到一次性加载
+    if not instance_stream_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'message': '状态推送连接数已满，请稍后刷新'}), 503
+    try:
+        subscription = topic_watch_hub.subscribe(topic_name)
+    except Exception:
+        instance_stream_slots.release()
+        raise
+    
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event, data = subscription.get(timeout=15)
+                except queue.Empty:
+                    # 定期发送注释行保持连接，同时及时发现已断开的客户端
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        finally:
+            topic_watch_hub.unsubscribe(topic_name, subscription)
+    
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # 连接关闭时释放名额，客户端在第一次推送前断开也会调用
+    response.call_on_close(instance_stream_slots.release)
+    return response
+
 @app.route('/api/crp/branches')
 def api_crp_branches():
     """获取项目分支信息"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
         topic_name = request.args.get('topic')
@@ -224,7 +297,7 @@ def api_crp_branches():
 def api_crp_latest_commit():
     """获取项目最新提交信息"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
         project_name = request.args.get('project')
@@ -247,7 +320,7 @@ def api_crp_latest_commit():
 def api_crp_package():
     """创建打包任务"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
         data = request.get_json()
@@ -262,6 +335,7 @@ def api_crp_package():
         if 'error' in result:
             return jsonify({'success': False, 'message': result['error']})
         else:
+            response_cache.invalidate('crp_instances', lambda key: key == data.get('topic'))
             return jsonify({'success': True, 'message': '打包任务创建成功', 'result': result})
     except Exception as e:
         return jsonify({'success': False, 'message': f'创建打包任务失败: {str(e)}'})
@@ -270,19 +344,37 @@ def api_crp_package():
 def api_crp_batch_package():
     """批量创建打包任务"""
     try:
-        if not crp_manager.token:
+        if not crp_manager.ensure_login():
             return jsonify({'success': False, 'message': '请先登录'})
         
         data = request.get_json()
-        results = crp_manager.batch_create_packages(
-            topic_name=data.get('topic'),
-            packages=data.get('packages', [])
-        )
+        topic_name = data.get('topic')
+        packages = data.get('packages', [])
+        if not topic_name or not packages:
+            return jsonify({'success': False, 'message': '参数缺失'})
         
-        return jsonify({'success': True, 'message': '批量打包任务创建完成', 'results': results})
+        def run_batch(progress):
+            result = crp_manager.batch_create_packages(topic_name, packages, progress=progress)
+            return {'upstream_calls': result['upstream_calls']}
+        
+        job_id = job_queue.submit(
+            'batch-package',
+            [package_info['name'] for package_info in packages],
+            run_batch,
+            on_done=lambda: response_cache.invalidate('crp_instances', lambda key: key == topic_name)
+        )
+        return jsonify({'success': True, 'message': '批量打包任务已提交', 'job_id': job_id})
     except Exception as e:
         return jsonify({'success': False, 'message': f'批量创建打包任务失败: {str(e)}'})
 
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """获取后台任务的进度和每一项的结果"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': '任务不存在'})
+    return jsonify({'success': True, 'job': job})
+
 @app.route('/git')
 def git_page():
     """Git标签管理页面"""
@@ -294,7 +386,13 @@ def api_git_repos():
     try:
         org = request.args.get('org', '')
         name_filter = request.args.get('filter', '')
-        repos = git_manager.get_org_repos(org, name_filter)
+        refresh = request.args.get('refresh', '') in ('1', 'true')
+        if refresh:
+            response_cache.invalidate('git_repos', lambda key: key[0] == org)
+        repos = response_cache.get_or_load(
+            'git_repos', (org, name_filter),
+            lambda: git_manager.get_org_repos(org, name_filter, refresh=refresh)
+        )
         return jsonify({'success': True, 'repos': repos})
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取仓库列表失败: {str(e)}'})
@@ -303,8 +401,14 @@ def api_git_repos():
 def api_git_watch_repos():
     """获取关注仓库状态"""
     try:
-        repos_status = git_manager.get_watch_repos_status()
-        return jsonify({'success': True, 'repos': repos_status})
+        # 页面自动加载为非交互式刷新，点击刷新按钮时带refresh=1
+        interactive = request.args.get('refresh', '') in ('1', 'true')
+        repos_status = git_manager.get_watch_repos_status(interactive=interactive)
+        return jsonify({
+            'success': True,
+            'repos': repos_status,
+            'budget_low': git_manager.is_github_budget_low()
+        })
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取关注仓库状态失败: {str(e)}'})
 
@@ -318,14 +422,17 @@ def api_git_latest_tag():
         if not org or not repo:
             return jsonify({'success': False, 'message': '参数缺失'})
         
-        latest_tag = git_manager.get_latest_tag(org, repo)
-        next_tag = git_manager.generate_next_tag(latest_tag)
+        def load_tags():
+            latest_tag = git_manager.get_latest_tag(org, repo)
+            return {'latest_tag': latest_tag, 'next_tag': git_manager.generate_next_tag(latest_tag)}
         
-        return jsonify({
-            'success': True, 
-            'latest_tag': latest_tag,
-            'next_tag': next_tag
-        })
+        # 获取失败时get_latest_tag返回0.0.0，不缓存
+        tags = response_cache.get_or_load(
+            'git_latest_tag', (org, repo), load_tags,
+            should_cache=lambda tags: tags['latest_tag'] != '0.0.0'
+        )
+        
+        return jsonify({'success': True, **tags})
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取标签信息失败: {str(e)}'})
 
@@ -367,10 +474,51 @@ def api_git_create_tag():
         if 'error' in result:
             return jsonify({'success': False, 'message': result['error']})
         else:
+            response_cache.invalidate('git_latest_tag', lambda key: key == (data.get('org'), data.get('repo')))
+            match = re.search(r'/pull/(\d+)', result.get('pr_url', ''))
+            if match:
+                result['tracked_pr'] = pr_tracker.add(data.get('org'), data.get('repo'), int(match.group(1)),
+                                                      tag=data.get('tag', ''), pr_url=result['pr_url'])
             return jsonify({'success': True, 'message': '标签PR创建成功', 'result': result})
     except Exception as e:
         return jsonify({'success': False, 'message': f'创建标签PR失败: {str(e)}'})
 
+@app.route('/api/git/tracked-prs', methods=['GET', 'POST'])
+def api_git_tracked_prs():
+    """获取所有跟踪PR及其状态，或添加跟踪PR"""
+    if request.method == 'GET':
+        try:
+            result = pr_tracker.list(force=request.args.get('refresh') == '1')
+            return jsonify({'success': True, 'prs': result['prs'], 'refreshed_at': result['refreshed_at'],
+                            'refresh_interval': pr_tracker.refresh_interval})
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'获取跟踪PR失败: {str(e)}'})
+    
+    try:
+        data = request.get_json()
+        match = re.search(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)', data.get('pr_url', ''))
+        org = data.get('org') or (match and match.group(1))
+        repo = data.get('repo') or (match and match.group(2))
+        number = data.get('number') or (match and match.group(3))
+        if not org or not repo or not number:
+            return jsonify({'success': False, 'message': '参数缺失'})
+        
+        pr = pr_tracker.add(org, repo, int(number), tag=data.get('tag', ''),
+                            pr_url=data.get('pr_url', ''), created_at=data.get('created_at'))
+        return jsonify({'success': True, 'pr': pr})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'添加跟踪PR失败: {str(e)}'})
+
+@app.route('/api/git/tracked-prs/<org>/<repo>/<int:number>', methods=['DELETE'])
+def api_git_tracked_pr_delete(org, repo, number):
+    """取消跟踪PR"""
+    try:
+        if pr_tracker.remove(PRTracker.pr_id(org, repo, number)):
+            return jsonify({'success': True, 'message': '已取消跟踪'})
+        return jsonify({'success': False, 'message': '跟踪PR不存在'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'取消跟踪PR失败: {str(e)}'})
+
 @app.route('/api/git/pr-status')
 def api_git_pr_status():
     """获取PR状态"""
@@ -387,6 +535,32 @@ def api_git_pr_status():
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取PR状态失败: {str(e)}'})
 
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    """获取接口缓存的命中统计"""
+    return jsonify({
+        'success': True,
+        'caches': response_cache.stats(),
+        'github_etag': git_manager.etag_cache.stats()
+    })
+
+@app.route('/api/metrics')
+def api_metrics():
+    """获取GitHub速率限制额度、上游接口调用统计和缓存统计
+
+    统计保存在各worker进程内，返回的是处理本次请求的worker的数据，pid用于区分worker
+    """
+    return jsonify({
+        'success': True,
+        'scope': 'worker',
+        'pid': os.getpid(),
+        'github_budget': github_budget.snapshot(),
+        'github_budget_low': git_manager.is_github_budget_low(),
+        'upstream': upstream_metrics.snapshot(),
+        'caches': response_cache.stats(),
+        'github_etag': git_manager.etag_cache.stats()
+    })
+
 def init_app():
     """初始化应用，自动连接CRP"""
     try:
@@ -398,13 +572,50 @@ def init_app():
     except Exception as e:
         app.logger.error(f"CRP自动登录异常: {str(e)}")
 
+def run_production_server(web_config):
+    """使用gunicorn多进程多线程运行应用
+
+    应用在主进程中加载并完成CRP登录后再fork出worker，各worker继承登录状态（token），
+    但不共用主进程的CRP连接，各worker在fork后首次请求时重新创建自己的连接池；
+    之后的配置修改通过配置文件同步到所有worker，未登录的worker会按配置自动登录。
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{web_config.get('host', '0.0.0.0')}:{web_config.get('port', 5000)}")
+            self.cfg.set('workers', int(web_config.get('workers', 4)))
+            self.cfg.set('threads', int(web_config.get('threads', 8)))
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', int(web_config.get('timeout', 120)))
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return app
+
+    ProductionServer().run()
+
 if __name__ == '__main__':
     # 初始化应用
     init_app()
     
     web_config = config_manager.get_web_config()
-    app.run(
-        host=web_config.get('host', '0.0.0.0'),
-        port=web_config.get('port', 5000),
-        debug=web_config.get('debug', True)
-    )
\ No newline at end of file
+    # 旧版本首次启动时把debug: True写入了配置文件，因此开发服务器只由单独的dev_server或FLASK_DEBUG开启，
+    # debug只控制日志级别
+    if web_config.get('dev_server', False) or os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true'):
+        # 开发服务器（单进程，开启自动重载），仅用于本地开发
+        app.run(
+            host=web_config.get('host', '0.0.0.0'),
+            port=web_config.get('port', 5000),
+            debug=True
+        )
+    else:
+        try:
+            run_production_server(web_config)
+        except ImportError:
+            app.logger.warning("未安装gunicorn，使用Flask多线程服务器运行，请执行 pip install -r requirements.txt")
+            app.run(
+                host=web_config.get('host', '0.0.0.0'),
+                port=web_config.get('port', 5000),
+                threaded=True
+            )
@@ -3,6 +3,7 @@ import yaml
 import json
 import rsa
 import base64
+import threading
 from typing import Dict, Any, Optional
 
 class ConfigManager:
@@ -14,16 +15,29 @@ class ConfigManager:
         self.config_dir = os.path.abspath(config_dir)
         self.config_file = os.path.join(self.config_dir, 'config.yaml')
         self._config = None
+        self._mtime = None
+        self._lock = threading.RLock()
         self._load_config()
     
     def _load_config(self):
         """加载配置文件"""
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                self._config = yaml.safe_load(f) or {}
-        else:
-            self._config = self._get_default_config()
-            self.save_config()
+        with self._lock:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    self._config = yaml.safe_load(f) or {}
+                self._mtime = os.stat(self.config_file).st_mtime_ns
+            else:
+                self._config = self._get_default_config()
+                self.save_config()
+    
+    def _reload_if_changed(self):
+        """配置文件被其他worker进程修改后重新加载，保证多进程部署时各进程看到的配置一致"""
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._load_config()
     
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
@@ -59,36 +73,46 @@ class ConfigManager:
             'web': {
                 'host': '0.0.0.0',
                 'port': 5000,
-                'debug': True,
+                'debug': False,
+                'dev_server': False,
+                'workers': 4,
+                'threads': 8,
+                'timeout': 120,
                 'secret_key': 'dev-tool-web-secret-key-change-in-production'
             }
         }
     
     def get_config(self, section: str = None) -> Dict[str, Any]:
         """获取配置"""
+        self._reload_if_changed()
         if section:
             return self._config.get(section, {})
         return self._config
     
     def set_config(self, section: str, key: str, value: Any):
         """设置配置"""
-        if section not in self._config:
-            self._config[section] = {}
-        
-        # 支持嵌套键，如 auth.userId
-        keys = key.split('.')
-        current = self._config[section]
-        for k in keys[:-1]:
-            if k not in current:
-                current[k] = {}
-            current = current[k]
-        current[keys[-1]] = value
+        with self._lock:
+            if section not in self._config:
+                self._config[section] = {}
+            
+            # 支持嵌套键，如 auth.userId
+            keys = key.split('.')
+            current = self._config[section]
+            for k in keys[:-1]:
+                if k not in current:
+                    current[k] = {}
+                current = current[k]
+            current[keys[-1]] = value
     
     def save_config(self):
-        """保存配置到文件"""
-        os.makedirs(self.config_dir, exist_ok=True)
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            yaml.dump(self._config, f, default_flow_style=False, allow_unicode=True)
+        """原子写入配置文件，避免其他进程读到写了一半的文件"""
+        with self._lock:
+            os.makedirs(self.config_dir, exist_ok=True)
+            tmp_path = f"{self.config_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                yaml.dump(self._config, f, default_flow_style=False, allow_unicode=True)
+            os.replace(tmp_path, self.config_file)
+            self._mtime = os.stat(self.config_file).st_mtime_ns
     
     def encrypt_crp_password(self, password: str) -> str:
         """加密CRP密码"""
@@ -125,41 +149,45 @@ fe9YvvT0lqy2BtBpaQIDAQAB
     
     def update_crp_config(self, config_data: Dict[str, Any]):
         """更新CRP配置"""
-        crp_config = self.get_config('crp')
-        
-        # 处理认证信息
-        if 'auth' in config_data:
-            auth = config_data['auth']
-            if 'userId' in auth:
-                self.set_config('crp', 'auth.userId', auth['userId'])
-            if 'password' in auth and auth['password'] and auth['password'] != '***':
-                # 只有在密码不是占位符时才加密和保存
-                encrypted_pwd = self.encrypt_crp_password(auth['password'])
-                self.set_config('crp', 'auth.password', encrypted_pwd)
-        
-        # 处理参数
-        if 'params' in config_data:
-            params = config_data['params']
-            for key, value in params.items():
-                self.set_config('crp', f'params.{key}', value)
-        
-        self.save_config()
+        with self._lock:
+            # 先合并其他进程已保存的修改，再写回
+            self._reload_if_changed()
+            # 处理认证信息
+            if 'auth' in config_data:
+                auth = config_data['auth']
+                if 'userId' in auth:
+                    self.set_config('crp', 'auth.userId', auth['userId'])
+                if 'password' in auth and auth['password'] and auth['password'] != '***':
+                    # 只有在密码不是占位符时才加密和保存
+                    encrypted_pwd = self.encrypt_crp_password(auth['password'])
+                    self.set_config('crp', 'auth.password', encrypted_pwd)
+            
+            # 处理参数
+            if 'params' in config_data:
+                params = config_data['params']
+                for key, value in params.items():
+                    self.set_config('crp', f'params.{key}', value)
+            
+            self.save_config()
     
     def update_git_config(self, config_data: Dict[str, Any]):
         """更新Git配置"""
-        # 处理认证信息
-        if 'auth' in config_data:
-            auth = config_data['auth']
-            for key, value in auth.items():
-                self.set_config('git', f'auth.{key}', value)
-        
-        # 处理参数
-        if 'params' in config_data:
-            params = config_data['params']
-            for key, value in params.items():
-                self.set_config('git', f'params.{key}', value)
-        
-        self.save_config()
+        with self._lock:
+            # 先合并其他进程已保存的修改，再写回
+            self._reload_if_changed()
+            # 处理认证信息
+            if 'auth' in config_data:
+                auth = config_data['auth']
+                for key, value in auth.items():
+                    self.set_config('git', f'auth.{key}', value)
+            
+            # 处理参数
+            if 'params' in config_data:
+                params = config_data['params']
+                for key, value in params.items():
+                    self.set_config('git', f'params.{key}', value)
+            
+            self.save_config()
 
 # 全局配置管理器实例
 config_manager = ConfigManager()
\ No newline at end of file
@@ -1,9 +1,26 @@
 import requests
 import json
+import os
+import re
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from .config_manager import config_manager
+from .upstream_metrics import upstream_metrics
+
+# 批量打包解析项目名称时遍历项目目录的每页数量和最大页数
+PROJECT_CATALOG_PAGE_SIZE = 500
+PROJECT_CATALOG_MAX_PAGES = 20
+# CRP连接池大小，与gunicorn每个worker的线程数和批量打包的并发数相当
+CRP_POOL_SIZE = 16
+# 登录失败后多少秒内不再自动重试
+LOGIN_RETRY_INTERVAL = 60
+# 主题名称到ID的缓存有效期（秒），主题被删除后重建时ID会变化
+TOPIC_ID_TTL = 300
 
 class CRPManager:
     """CRP包管理器"""
@@ -14,6 +31,31 @@ class CRPManager:
         self.user_name = None
         self.logger = logging.getLogger(__name__)
         self.config_manager = config_manager
+        self._login_lock = threading.Lock()
+        self._login_failed_at = 0.0
+        # 主题名称 -> (主题ID, 查询时间)
+        self._topic_ids: Dict[str, Tuple[int, float]] = {}
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        """本进程所有线程共用的连接池；认证头按请求传入，不修改session的共享状态
+
+        连接池按进程创建：gunicorn在主进程登录CRP后fork出worker，继承的keep-alive连接
+        会被多个进程同时读写，因此fork后的进程丢弃继承的session（不关闭，避免影响其他进程的连接）并重新创建。
+        """
+        pid = os.getpid()
+        if self._session_pid != pid:
+            with self._session_lock:
+                if self._session_pid != pid:
+                    session = requests.Session()
+                    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=CRP_POOL_SIZE))
+                    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=CRP_POOL_SIZE))
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
     
     def _get_headers(self, need_auth: bool = True) -> Dict[str, str]:
         """获取请求头"""
@@ -22,18 +64,47 @@ class CRPManager:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
     
+    def _request(self, method: str, url: str, need_auth: bool = True, retry_auth: bool = True,
+                 **kwargs) -> requests.Response:
+        """通过连接池发送CRP请求，记录调用次数和耗时
+
+        需要认证的请求返回401时token已失效：重新登录（并发请求只登录一次，其他请求等待登录结果）后重试一次。
+        """
+        token = self.token
+        path = re.sub(r'/\d+(?=/|$)', '/:id', url[len(self.base_url):])
+        endpoint = f"{method.upper()} {path}"
+        start = time.monotonic()
+        try:
+            response = self.session.request(method, url, headers=self._get_headers(need_auth), timeout=30, **kwargs)
+        except requests.exceptions.RequestException:
+            upstream_metrics.record('crp', endpoint, 0, time.monotonic() - start)
+            raise
+        upstream_metrics.record('crp', endpoint, response.status_code, time.monotonic() - start)
+        
+        if response.status_code == 401 and need_auth and retry_auth:
+            self.logger.info(f"CRP token expired ({endpoint}), logging in again")
+            if self._relogin(token):
+                return self._request(method, url, need_auth=need_auth, retry_auth=False, **kwargs)
+        return response
+    
+    def _relogin(self, stale_token: Optional[str]) -> bool:
+        """token失效后重新登录，返回是否已持有新token"""
+        with self._login_lock:
+            # 等待锁期间其他请求已经重新登录
+            if self.token and self.token != stale_token:
+                return True
+            if time.monotonic() - self._login_failed_at < LOGIN_RETRY_INTERVAL:
+                return False
+            self.token = None
+            if self.login():
+                return True
+            self._login_failed_at = time.monotonic()
+            return False
+    
     def _make_request(self, method: str, url: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Optional[Dict]:
         """统一的请求方法"""
         try:
-            headers = self._get_headers()
-            
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
+            response = self._request(method, url, json=data, params=params)
             response.raise_for_status()
             return response.json()
             
@@ -69,12 +140,7 @@ class CRPManager:
             self.logger.info(f"发送登录请求到: {url}")
             self.logger.debug(f"请求数据: {json.dumps(data, ensure_ascii=False)}")
             
-            response = requests.post(
-                url,
-                headers=self._get_headers(False),
-                data=json.dumps(data),
-                timeout=30
-            )
+            response = self._request('POST', url, need_auth=False, data=json.dumps(data))
             
             self.logger.info(f"响应状态码: {response.status_code}")
             self.logger.debug(f"响应头: {dict(response.headers)}")
@@ -106,15 +172,30 @@ class CRPManager:
             self.logger.error(f"登录失败: {str(e)}")
             return False
     
+    def ensure_login(self, retry_interval: int = LOGIN_RETRY_INTERVAL) -> bool:
+        """确保当前进程已登录
+
+        多worker部署时每个进程各自持有token，未登录的进程按配置自动登录；
+        同一进程内的并发请求只登录一次，登录失败后retry_interval秒内不再重试。
+        """
+        if self.token:
+            return True
+        with self._login_lock:
+            if self.token:
+                return True
+            if time.monotonic() - self._login_failed_at < retry_interval:
+                return False
+            if self.login():
+                return True
+            self._login_failed_at = time.monotonic()
+            return False
+    
     def fetch_user(self) -> str:
         """获取用户信息"""
         try:
             url = f"{self.base_url}/user"
-            response = requests.get(
-                url,
-                headers=self._get_headers(),
-                timeout=30
-            )
+            # 登录过程中调用，不能再触发重新登录
+            response = self._request('GET', url, retry_auth=False)
             response.raise_for_status()
             
             result = response.json()
@@ -164,19 +245,13 @@ class CRPManager:
                 "BranchID": params.get('branchId', 123)
             }
             
-            response = requests.post(
-                url,
-                headers=self._get_headers(),
-                json=data,
-                timeout=30
-            )
+            response = self._request('POST', url, json=data)
             response.raise_for_status()
             
             topics = response.json()
             
             # 如果有主题过滤器，进行模糊匹配
             if topic_filter:
-                import re
                 filtered_topics = []
                 for topic in topics:
                     topic_name = topic.get('Name', '')
@@ -191,11 +266,7 @@ class CRPManager:
             # 如果搜索API失败，回退到原来的方法
             try:
                 url = f"{self.base_url}/topic"
-                response = requests.get(
-                    url,
-                    headers=self._get_headers(),
-                    timeout=30
-                )
+                response = self._request('GET', url)
                 response.raise_for_status()
                 
                 topics = response.json()
@@ -217,54 +288,88 @@ class CRPManager:
     def list_instances(self, topic_name: str) -> List[Dict[str, Any]]:
         """获取主题下的打包实例列表"""
         try:
-            # 首先需要通过主题名称找到主题ID
-            topic_id = self._get_topic_id_by_name(topic_name)
-            if not topic_id:
-                self.logger.error(f"找不到主题: {topic_name}")
-                return []
-            
-            # 使用正确的API端点
-            url = f"{self.base_url}/topics/{topic_id}/releases"
-            
-            response = requests.get(
-                url,
-                headers=self._get_headers(),
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            return response.json()
-            
+            return self.fetch_instances(topic_name)
         except Exception as e:
             self.logger.error(f"List instances failed: {str(e)}")
             return []
     
-    def _get_topic_id_by_name(self, topic_name: str) -> Optional[int]:
-        """通过主题名称获取主题ID"""
+    def fetch_instances(self, topic_name: str) -> List[Dict[str, Any]]:
+        """获取主题下的打包实例列表，失败时抛出异常（供需要区分空列表和失败的调用方使用）"""
+        # 首先需要通过主题名称找到主题ID
+        topic_id = self._get_topic_id_by_name(topic_name)
+        if not topic_id:
+            raise ValueError(f"找不到主题: {topic_name}")
+        
+        # 使用正确的API端点
+        url = f"{self.base_url}/topics/{topic_id}/releases"
+        
+        response = self._request('GET', url)
+        if response.status_code == 404:
+            # 主题已被删除（可能以相同名称重建），下次重新查询ID
+            self._topic_ids.pop(topic_name, None)
+        response.raise_for_status()
+        
+        return response.json()
+    
+    def _get_topic_id_by_name(self, topic_name: str, refresh: bool = False) -> Optional[int]:
+        """通过主题名称获取主题ID，查到后缓存TOPIC_ID_TTL秒，refresh为True时忽略缓存重新查询"""
+        cached = self._topic_ids.get(topic_name)
+        if cached and not refresh and time.monotonic() - cached[1] < TOPIC_ID_TTL:
+            return cached[0]
         try:
             # 获取所有主题，找到匹配的ID
             topics = self.list_topics()
             for topic in topics:
                 if topic.get('Name') == topic_name:
+                    self._topic_ids[topic_name] = (topic.get('ID'), time.monotonic())
                     return topic.get('ID')
+            self._topic_ids.pop(topic_name, None)
             return None
         except Exception as e:
             self.logger.error(f"Get topic ID failed: {str(e)}")
             return None
     
-    def get_topic_id(self, topic_name: str) -> Optional[int]:
-        """获取主题ID"""
-        try:
-            topics = self.list_topics()
-            for topic in topics:
-                if topic.get("Name") == topic_name:
-                    return topic.get("ID")
-            return None
-        except Exception as e:
-            self.logger.error(f"Get topic ID failed: {str(e)}")
-            return None
+    def _build_release_payload(self, topic_id: int, project: Dict[str, Any], branch: str,
+                               commit_hash: str, commit_message: str, archs: List[str],
+                               tag: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        """构造new_release接口的请求数据"""
+        return {
+            "Arches": ";".join(archs),  # 转换为字符串格式
+            "BaseTag": None,
+            "Branch": branch,
+            "BuildID": 0,
+            "BuildState": None,
+            "Changelog": [commit_message or "chore: update changelog"],
+            "Commit": commit_hash,
+            "History": None,
+            "ID": 0,
+            "ProjectID": project.get("ID"),
+            "ProjectName": project.get("Name"),
+            "ProjectRepoUrl": project.get("RepoUrl", ""),
+            "SlaveNode": None,
+            "Tag": tag or "1",
+            "TagSuffix": None,
+            "TopicID": topic_id,
+            "TopicType": params.get('topicType', 'test'),
+            "ChangeLogMode": True,  # 布尔值
+            "RepoType": "deb",  # 固定值
+            "Custom": True,  # 布尔值
+            "BranchID": str(params.get('branchId', '123'))  # 字符串格式
+        }
     
-
+    def _submit_release(self, topic_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """提交打包任务"""
+        # 使用正确的API端点
+        url = f"{self.base_url}/topics/{topic_id}/new_release"
+        
+        self.logger.debug(f"Creating package with data: {json.dumps(data, indent=2)}")
+        
+        response = self._make_request("POST", url, data=data)
+        
+        if response:
+            return {"success": True, "data": response}
+        else:
+            return {"error": "Failed to create package"}
     
     def create_package(self, topic_name: str, project_name: str, 
                       branch: str = None, archs: List[str] = None, 
@@ -282,7 +387,7 @@ class CRPManager:
                 archs = default_archs
             
             # 首先获取topic ID
-            topic_id = self.get_topic_id(topic_name)
+            topic_id = self._get_topic_id_by_name(topic_name)
             if not topic_id:
                 return {"error": f"Topic '{topic_name}' not found"}
             
@@ -323,77 +428,169 @@ class CRPManager:
                 if detailed_message:
                     commit_message = detailed_message
             
-            # 使用正确的API端点
-            url = f"{self.base_url}/topics/{topic_id}/new_release"
-            
-            # 获取配置中的默认值
-            crp_config = self.config_manager.get_crp_config()
-            params = crp_config.get('params', {})
-            
-            data = {
-                "Arches": ";".join(archs),  # 转换为字符串格式
-                "BaseTag": None,
-                "Branch": branch,
-                "BuildID": 0,
-                "BuildState": None,
-                "Changelog": [commit_message or "chore: update changelog"],
-                "Commit": commit_hash,
-                "History": None,
-                "ID": 0,
-                "ProjectID": project_id,
-                "ProjectName": project_name,
-                "ProjectRepoUrl": repo_url,
-                "SlaveNode": None,
-                "Tag": tag or "1",
-                "TagSuffix": None,
-                "TopicID": topic_id,
-                "TopicType": params.get('topicType', 'test'),
-                "ChangeLogMode": True,  # 布尔值
-                "RepoType": "deb",  # 固定值
-                "Custom": True,  # 布尔值
-                "BranchID": str(params.get('branchId', '123'))  # 字符串格式
-            }
-            
-            self.logger.debug(f"Creating package with data: {json.dumps(data, indent=2)}")
-            
-            response = self._make_request("POST", url, data=data)
-            
-            if response:
-                return {"success": True, "data": response}
-            else:
-                return {"error": "Failed to create package"}
+            data = self._build_release_payload(topic_id, target_project, branch, commit_hash,
+                                               commit_message, archs, tag, params)
+            return self._submit_release(topic_id, data)
             
         except Exception as e:
             self.logger.error(f"Create package failed: {str(e)}")
             return {"error": str(e)}
     
+    def _resolve_projects(self, names: List[str], count: Callable[[str], None]) -> Dict[str, Dict[str, Any]]:
+        """按名称解析项目：先分页遍历一次项目目录，目录中没有找到的再逐个按名称搜索"""
+        wanted = set(names)
+        found = {}
+        page = 1
+        while wanted - found.keys():
+            count('project')
+            projects = self.list_projects("", page, PROJECT_CATALOG_PAGE_SIZE).get("projects", [])
+            for project in projects:
+                if project.get("Name") in wanted:
+                    found[project["Name"]] = project
+            # 不足一页说明已到目录末尾（服务端限制了每页数量时也会提前结束，由下面的逐个搜索兜底）
+            if len(projects) < PROJECT_CATALOG_PAGE_SIZE or page >= PROJECT_CATALOG_MAX_PAGES:
+                break
+            page += 1
+        
+        for name in wanted - found.keys():
+            count('project')
+            for project in self.list_projects(name, 1, 5).get("projects", []):
+                if project.get("Name") == name:
+                    found[name] = project
+                    break
+        return found
+    
+    def plan_batch(self, topic_name: str, packages: List[Dict[str, Any]],
+                   max_workers: int = 4) -> Dict[str, Any]:
+        """解析批量打包所需的全部信息，构造每个打包任务的请求数据（不提交）
+
+        主题只解析一次，项目名称通过一次目录遍历解析，分支列表（每个项目一次）和提交信息并发获取。
+        返回topic_id、payloads（无法构造的为None）、errors（对应的错误信息）和upstream_calls（按接口统计的上游调用次数）。
+        """
+        calls: Dict[str, int] = {}
+        calls_lock = threading.Lock()
+        
+        def count(name: str):
+            with calls_lock:
+                calls[name] = calls.get(name, 0) + 1
+        
+        config = config_manager.get_crp_config()
+        params = config.get('params', {})
+        payloads: List[Optional[Dict[str, Any]]] = [None] * len(packages)
+        errors: List[Optional[str]] = [None] * len(packages)
+        
+        # 每个批次重新解析一次主题，之后整个批次使用同一个ID
+        count('topic')
+        topic_id = self._get_topic_id_by_name(topic_name, refresh=True)
+        if not topic_id:
+            errors = [f"Topic '{topic_name}' not found"] * len(packages)
+            return {'topic_id': None, 'payloads': payloads, 'errors': errors, 'upstream_calls': calls}
+        
+        projects = self._resolve_projects([package_info['name'] for package_info in packages], count)
+        
+        # 同一项目的多个打包任务共用一次分支列表请求
+        branch_lists: Dict[Any, Any] = {}
+        branch_lock = threading.Lock()
+        
+        def project_branches(project: Dict[str, Any]) -> List[Dict]:
+            with branch_lock:
+                entry = branch_lists.get(project.get("ID"))
+                if entry is None:
+                    entry = branch_lists[project.get("ID")] = {'lock': threading.Lock(), 'branches': None}
+            with entry['lock']:
+                if entry['branches'] is None:
+                    count('branches')
+                    entry['branches'] = self.get_project_branches(project.get("ID"))
+                return entry['branches']
+        
+        def plan(index: int):
+            package_info = packages[index]
+            project_name = package_info['name']
+            branch = package_info.get('branch') or params.get('projectBranch', 'upstream/master')
+            archs = package_info.get('archs') or params.get('defaultArchs', ['amd64'])
+            
+            project = projects.get(project_name)
+            if not project:
+                errors[index] = f"Project '{project_name}' not found"
+                return
+            
+            target_branch = None
+            for b in project_branches(project):
+                if b.get("Name") == branch:
+                    target_branch = b
+                    break
+            if not target_branch:
+                errors[index] = f"Branch '{branch}' not found in project '{project_name}'"
+                return
+            
+            commit_hash = target_branch.get("Commit", "")
+            commit_message = target_branch.get("Message", "")
+            repo_url = project.get("RepoUrl", "")
+            if repo_url and commit_hash:
+                count('commit_message')
+                commit_message = self._fetch_commit_message(repo_url, commit_hash) or commit_message
+            
+            payloads[index] = self._build_release_payload(topic_id, project, branch, commit_hash,
+                                                          commit_message, archs, package_info.get('tag'), params)
+        
+        if packages:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(packages))) as executor:
+                for index, future in enumerate([executor.submit(plan, index) for index in range(len(packages))]):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.error(f"Plan package {packages[index]['name']} failed: {str(e)}")
+                        errors[index] = str(e)
+        
+        return {'topic_id': topic_id, 'payloads': payloads, 'errors': errors, 'upstream_calls': calls}
+    
     def batch_create_packages(self, topic_name: str, 
-                            packages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """批量创建打包任务"""
-        results = []
-        for package_info in packages:
-            result = self.create_package(
-                topic_name=topic_name,
-                project_name=package_info['name'],
-                branch=package_info.get('branch'),
-                archs=package_info.get('archs'),
-                tag=package_info.get('tag')
-            )
-            results.append({
-                'name': package_info['name'],
-                'result': result
-            })
-        return results
+                            packages: List[Dict[str, Any]],
+                            progress: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                            max_workers: int = 4) -> Dict[str, Any]:
+        """批量创建打包任务
+
+        先通过plan_batch一次性解析主题、项目、分支和提交信息并构造所有请求数据，再最多同时提交max_workers个打包任务，
+        每完成一个调用progress(序号, 结果)。返回results（每个项目的结果）和upstream_calls（本批次各接口的上游调用次数）。
+        """
+        plan = self.plan_batch(topic_name, packages, max_workers=max_workers)
+        calls = plan['upstream_calls']
+        results: List[Optional[Dict[str, Any]]] = [None] * len(packages)
+        
+        def report(index: int, result: Dict[str, Any]):
+            results[index] = {'name': packages[index]['name'], 'result': result}
+            if progress:
+                progress(index, result)
+        
+        def submit(index: int):
+            try:
+                result = self._submit_release(plan['topic_id'], plan['payloads'][index])
+            except Exception as e:
+                self.logger.error(f"Create package {packages[index]['name']} failed: {str(e)}")
+                result = {"error": str(e)}
+            report(index, result)
+        
+        pending = []
+        for index, payload in enumerate(plan['payloads']):
+            if payload is None:
+                report(index, {"error": plan['errors'][index]})
+            else:
+                pending.append(index)
+        
+        if pending:
+            calls['new_release'] = len(pending)
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                list(executor.map(submit, pending))
+        
+        calls['total'] = sum(calls.values())
+        self.logger.info(f"Batch of {len(packages)} packages in topic {topic_name} made {calls['total']} upstream calls: {calls}")
+        return {'results': results, 'upstream_calls': calls}
     
     def get_instance_detail(self, instance_id: int) -> Dict[str, Any]:
         """获取打包实例详情"""
         try:
             url = f"{self.base_url}/instance/{instance_id}"
-            response = requests.get(
-                url,
-                headers=self._get_headers(),
-                timeout=30
-            )
+            response = self._request('GET', url)
             response.raise_for_status()
             
             return response.json()
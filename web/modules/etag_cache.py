@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class ETagCache:
+    """保存GitHub REST响应的ETag、Last-Modified和响应体，用于条件请求
+
+    下次请求同一资源时带上If-None-Match/If-Modified-Since，GitHub返回304时直接使用保存的响应体，
+    304响应不计入GitHub的速率限制。按LRU淘汰，最多保存maxsize个响应。
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.not_modified = 0
+        self.modified = 0
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def conditional_headers(self, key: Hashable) -> Dict[str, str]:
+        """返回条件请求头，没有保存过该资源时返回空字典"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            self._entries.move_to_end(key)
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """304响应时取出保存的响应体"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.not_modified += 1
+            return entry['body']
+
+    def store(self, key: Hashable, etag: Optional[str], last_modified: Optional[str], body: Any):
+        """保存200响应，没有ETag和Last-Modified的响应无法做条件请求，不保存"""
+        with self._lock:
+            self.modified += 1
+            if not etag and not last_modified:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = {'etag': etag, 'last_modified': last_modified, 'body': body}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'not_modified': self.not_modified,
+                'modified': self.modified
+            }
@@ -3,10 +3,24 @@ import requests
 import json
 import os
 import re
+import hashlib
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from .config_manager import config_manager
+from .repo_index import RepoIndex
+from .etag_cache import ETagCache
+from .tag_resolver import TagResolver
+from .upstream_metrics import github_budget, upstream_metrics
+
+# 一次GraphQL查询中包含的关注仓库数，以及每个仓库获取的提交和标签数量（提交数与TagResolver的分页大小一致，以便继续向下翻页）
+WATCH_REPOS_PER_QUERY = 50
+WATCH_HISTORY_DEPTH = 100
+WATCH_TAGS_DEPTH = 100
+# 一次GraphQL查询中包含的跟踪PR数
+TRACKED_PRS_PER_QUERY = 50
 
 class GitManager:
     """Git标签管理器"""
@@ -14,6 +28,11 @@ class GitManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.github_api_base = "https://api.github.com"
+        self.github_graphql_url = "https://api.github.com/graphql"
+        self.repo_index = RepoIndex(self._fetch_org_repos_page, throttle=github_budget.is_low)
+        self.etag_cache = ETagCache()
+        self.tag_resolver = TagResolver(self._github_get, self.github_api_base)
+        self._watch_status = None
     
     def _run_command(self, cmd: List[str], cwd: str = None) -> Dict[str, Any]:
         """执行命令"""
@@ -64,47 +83,90 @@ class GitManager:
         
         return headers
     
-    def get_org_repos(self, org: str = None, name_filter: str = "") -> List[Dict[str, Any]]:
-        """获取组织下的仓库列表"""
+    def _get_github_proxies(self) -> Optional[Dict[str, str]]:
+        """获取GitHub访问代理"""
+        git_config = config_manager.get_git_config()
+        proxy = git_config.get('auth', {}).get('proxy', '')
+        if proxy:
+            return {
+                'http': proxy,
+                'https': proxy
+            }
+        return None
+    
+    def _github_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送GitHub请求，记录速率限制额度、调用次数和耗时"""
+        endpoint = f"{method} {upstream_metrics.github_endpoint(url)}"
+        start = time.monotonic()
+        try:
+            response = requests.request(method, url, proxies=self._get_github_proxies(), timeout=30, **kwargs)
+        except requests.exceptions.RequestException:
+            upstream_metrics.record('github', endpoint, 0, time.monotonic() - start)
+            raise
+        upstream_metrics.record('github', endpoint, response.status_code, time.monotonic() - start)
+        github_budget.record_headers(response.headers)
+        if response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+            self.logger.warning(f"GitHub rate limit exhausted ({endpoint}), resets at "
+                                f"{datetime.fromtimestamp(int(response.headers.get('X-RateLimit-Reset', 0)))}")
+        return response
+    
+    def _github_graphql(self, query: str) -> Dict[str, Any]:
+        """执行GitHub GraphQL查询，返回完整响应（包含data和errors），并记录查询消耗的点数"""
+        query = query.rstrip()
+        if not query.endswith('}'):
+            raise ValueError("Invalid GraphQL query")
+        # 在查询中附加rateLimit字段以获得本次查询的消耗
+        query = query[:-1] + " rateLimit { cost } }"
+        response = self._github_request('POST', self.github_graphql_url, headers=self._get_github_headers(), json={'query': query})
+        response.raise_for_status()
+        result = response.json()
+        github_budget.record_graphql_cost(((result.get('data') or {}).get('rateLimit') or {}).get('cost', 0))
+        return result
+    
+    def _github_get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GitHub REST GET请求，带上次响应的ETag/Last-Modified做条件请求，304时返回保存的响应体"""
+        headers = self._get_github_headers()
+        # 不同token看到的内容可能不同，缓存键包含token的摘要
+        token_digest = hashlib.sha256(headers.get('Authorization', '').encode()).hexdigest()[:16]
+        key = (url, tuple(sorted((params or {}).items())), token_digest)
+        headers.update(self.etag_cache.conditional_headers(key))
+        
+        response = self._github_request('GET', url, headers=headers, params=params)
+        if response.status_code == 304:
+            body = self.etag_cache.get(key)
+            if body is not None:
+                return body
+            # 保存的响应已被淘汰，重新完整请求
+            headers.pop('If-None-Match', None)
+            headers.pop('If-Modified-Since', None)
+            response = self._github_request('GET', url, headers=headers, params=params)
+        response.raise_for_status()
+        
+        body = response.json()
+        self.etag_cache.store(key, response.headers.get('ETag'), response.headers.get('Last-Modified'), body)
+        return body
+    
+    def _fetch_org_repos_page(self, org: str, page: int) -> List[Dict[str, Any]]:
+        """按更新时间倒序获取组织仓库的一页数据"""
+        url = f"{self.github_api_base}/orgs/{org}/repos"
+        params = {
+            'type': 'all',
+            'sort': 'updated',
+            'direction': 'desc',
+            'per_page': 100,
+            'page': page
+        }
+        
+        return self._github_get(url, params)
+    
+    def get_org_repos(self, org: str = None, name_filter: str = "", refresh: bool = False) -> List[Dict[str, Any]]:
+        """获取组织下的仓库列表（从本地仓库索引查询，支持模糊匹配）"""
         try:
             if not org:
                 config = config_manager.get_git_config()
                 org = config.get('params', {}).get('projectOrg', 'linuxdeepin')
             
-            url = f"{self.github_api_base}/orgs/{org}/repos"
-            params = {
-                'type': 'all',
-                'sort': 'updated',
-                'direction': 'desc',
-                'per_page': 100
-            }
-            
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                params=params,
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            repos = response.json()
-            
-            # 如果有名称过滤器，进行模糊匹配
-            if name_filter:
-                repos = [r for r in repos if name_filter.lower() in r.get('name', '').lower()]
-            
-            return repos
+            return self.repo_index.search(org, name_filter, full=refresh)
             
         except Exception as e:
             self.logger.error(f"Get org repos failed: {str(e)}")
@@ -119,26 +181,7 @@ class GitManager:
                 'per_page': 10
             }
             
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                params=params,
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            return response.json()
+            return self._github_get(url, params)
             
         except Exception as e:
             self.logger.error(f"Get repo commits failed: {str(e)}")
@@ -150,100 +193,19 @@ class GitManager:
             url = f"{self.github_api_base}/repos/{org}/{repo}/tags"
             params = {'per_page': 20}
             
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                params=params,
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            return response.json()
+            return self._github_get(url, params)
             
         except Exception as e:
             self.logger.error(f"Get repo tags failed: {str(e)}")
             return []
     
-    def get_latest_tag_from_commits(self, org: str, repo: str) -> Dict[str, Any]:
+    def get_latest_tag_from_commits(self, org: str, repo: str, branch: str = None) -> Dict[str, Any]:
         """
-        获取最新标签信息（基于提交历史，类似git describe --tags --abbrev=0的逻辑）
-        返回标签信息和对应的提交SHA
+        获取最新标签信息（基于分支历史，类似git describe --tags --abbrev=0的逻辑）
+        返回标签信息和对应的提交SHA，结果按分支头SHA缓存
         """
         try:
-            # 获取提交历史
-            commits = self.get_repo_commits(org, repo)
-            if not commits:
-                return {'tag': '0.0.0', 'commit_sha': '', 'found': False}
-            
-            # 获取所有标签
-            tags = self.get_repo_tags(org, repo)
-            if not tags:
-                return {'tag': '0.0.0', 'commit_sha': '', 'found': False}
-            
-            # 遍历提交历史，找到第一个有标签的提交
-            for commit in commits:
-                commit_sha = commit.get('sha', '')
-                # 检查这个提交是否有标签
-                for tag in tags:
-                    tag_commit_sha = tag.get('commit', {}).get('sha', '')
-                    if commit_sha == tag_commit_sha:
-                        tag_name = tag.get('name', '')
-                        self.logger.debug(f"Found tag {tag_name} at commit {commit_sha[:8]}")
-                        return {
-                            'tag': tag_name,
-                            'commit_sha': tag_commit_sha,
-                            'found': True,
-                            'tag_info': tag
-                        }
-            
-            # 如果没有找到匹配的提交，使用最新的版本号格式的标签
-            version_pattern = r'^\d+\.\d+\.\d+$'
-            version_tags = []
-            
-            for tag in tags:
-                tag_name = tag.get('name', '')
-                if re.match(version_pattern, tag_name):
-                    version_tags.append(tag)
-            
-            if version_tags:
-                # 按版本号排序，获取最新版本
-                def version_key(tag):
-                    tag_name = tag.get('name', '0.0.0')
-                    try:
-                        parts = tag_name.split('.')
-                        return (int(parts[0]), int(parts[1]), int(parts[2]))
-                    except (ValueError, IndexError):
-                        return (0, 0, 0)
-                
-                version_tags.sort(key=version_key, reverse=True)
-                latest_version_tag = version_tags[0]
-                return {
-                    'tag': latest_version_tag.get('name', '0.0.0'),
-                    'commit_sha': latest_version_tag.get('commit', {}).get('sha', ''),
-                    'found': True,
-                    'tag_info': latest_version_tag
-                }
-            
-            # 最后退化到第一个标签
-            first_tag = tags[0]
-            return {
-                'tag': first_tag.get('name', '0.0.0'),
-                'commit_sha': first_tag.get('commit', {}).get('sha', ''),
-                'found': True,
-                'tag_info': first_tag
-            }
-            
+            return self.tag_resolver.resolve(org, repo, branch)
         except Exception as e:
             self.logger.error(f"Get latest tag from commits failed: {str(e)}")
             return {'tag': '0.0.0', 'commit_sha': '', 'found': False}
@@ -379,93 +341,249 @@ Signed-off-by: {deb_email}"""
         try:
             url = f"{self.github_api_base}/repos/{org}/{repo}/pulls/{pr_number}"
             
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            return response.json()
+            return self._github_get(url)
             
         except Exception as e:
             self.logger.error(f"Get PR status failed: {str(e)}")
             return {}
     
-    def get_watch_repos_status(self) -> List[Dict[str, Any]]:
-        """获取关注仓库的状态"""
+    def get_tracked_pr_statuses(self, prs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """批量获取跟踪PR的状态
+
+        配置了GitHub token时用GraphQL查询（每次最多TRACKED_PRS_PER_QUERY个PR），
+        否则（或GraphQL失败的PR）并发调用REST接口。返回 {PR id: 状态}，获取失败的PR不在结果中。
+        """
+        statuses = {}
+        config = config_manager.get_git_config()
+        if config.get('auth', {}).get('githubToken', ''):
+            for start in range(0, len(prs), TRACKED_PRS_PER_QUERY):
+                statuses.update(self._fetch_pr_statuses_graphql(prs[start:start + TRACKED_PRS_PER_QUERY]))
+        
+        remaining = [pr for pr in prs if pr['id'] not in statuses]
+        if remaining:
+            def pr_status(pr: Dict[str, Any]) -> Dict[str, Any]:
+                return self.get_pr_status(pr['org'], pr['repo'], pr['number'])
+            
+            with ThreadPoolExecutor(max_workers=min(8, len(remaining))) as executor:
+                for pr, detail in zip(remaining, executor.map(pr_status, remaining)):
+                    if not detail:
+                        continue
+                    state = detail.get('state', 'unknown')
+                    if detail.get('merged'):
+                        state = 'merged'
+                    elif state == 'open' and detail.get('draft'):
+                        state = 'draft'
+                    statuses[pr['id']] = {
+                        'status': state,
+                        'title': detail.get('title', ''),
+                        'body': detail.get('body') or '',
+                        'author': (detail.get('user') or {}).get('login', ''),
+                        'updated_at': detail.get('updated_at', ''),
+                        'merged_at': detail.get('merged_at'),
+                        'additions': detail.get('additions', 0),
+                        'deletions': detail.get('deletions', 0),
+                        'changed_files': detail.get('changed_files', 0),
+                        'review_decision': None,
+                        'checks': None
+                    }
+        return statuses
+    
+    def _fetch_pr_statuses_graphql(self, prs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """用一次GraphQL查询获取多个PR的状态，查询失败的PR不在结果中"""
+        fields = """
+            state isDraft title bodyText updatedAt mergedAt
+            additions deletions changedFiles reviewDecision
+            author { login }
+            commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+        """
+        aliases = [
+            f"p{i}: repository(owner: {json.dumps(pr['org'])}, name: {json.dumps(pr['repo'])}) "
+            f"{{ pullRequest(number: {int(pr['number'])}) {{ {fields} }} }}"
+            for i, pr in enumerate(prs)
+        ]
+        query = "query { " + " ".join(aliases) + " }"
+        
+        try:
+            result = self._github_graphql(query)
+        except Exception as e:
+            self.logger.warning(f"GraphQL tracked PRs query failed, falling back to REST: {str(e)}")
+            return {}
+        
+        for error in result.get('errors') or []:
+            self.logger.warning(f"GraphQL tracked PRs error: {error.get('message', error)}")
+        
+        data = result.get('data') or {}
+        statuses = {}
+        for i, pr in enumerate(prs):
+            node = (data.get(f"p{i}") or {}).get('pullRequest')
+            if not node:
+                continue
+            
+            state = node.get('state', 'OPEN').lower()
+            commits = (node.get('commits') or {}).get('nodes') or [{}]
+            checks = ((commits[-1].get('commit') or {}).get('statusCheckRollup') or {}).get('state')
+            statuses[pr['id']] = {
+                'status': 'draft' if state == 'open' and node.get('isDraft') else state,
+                'title': node.get('title', ''),
+                'body': node.get('bodyText', ''),
+                'author': (node.get('author') or {}).get('login', ''),
+                'updated_at': node.get('updatedAt', ''),
+                'merged_at': node.get('mergedAt'),
+                'additions': node.get('additions', 0),
+                'deletions': node.get('deletions', 0),
+                'changed_files': node.get('changedFiles', 0),
+                'review_decision': node.get('reviewDecision'),
+                'checks': checks
+            }
+        return statuses
+    
+    def is_github_budget_low(self) -> bool:
+        """GitHub REST或GraphQL的速率限制额度是否紧张"""
+        return github_budget.is_low('core') or github_budget.is_low('graphql')
+    
+    def get_watch_repos_status(self, interactive: bool = True) -> List[Dict[str, Any]]:
+        """获取关注仓库的状态
+
+        配置了GitHub token时用一次GraphQL查询获取所有关注仓库的默认分支历史和标签，
+        否则（或GraphQL失败的仓库）并发调用REST接口，最新标签由tag_resolver按分支头SHA缓存解析。
+        非交互式的刷新在GitHub额度紧张时直接返回上一次的结果。
+        """
+        if not interactive and self._watch_status is not None and self.is_github_budget_low():
+            self.logger.info("GitHub rate limit budget is low, serving cached watch repos status")
+            return self._watch_status
+        
         try:
             config = config_manager.get_git_config()
             watch_repos = config.get('params', {}).get('watchRepos', [])
             org = config.get('params', {}).get('projectOrg', 'linuxdeepin')
+            if not watch_repos:
+                return []
             
-            repos_status = []
-            for repo_name in watch_repos:
-                self.logger.info(f"Processing repo: {org}/{repo_name}")
-                
-                # 获取最新提交
-                commits = self.get_repo_commits(org, repo_name)
-                latest_commit = commits[0] if commits else {}
-                
-                # 获取标签信息（使用基于提交历史的智能算法）
-                tag_info = self.get_latest_tag_from_commits(org, repo_name)
-                latest_tag = tag_info.get('tag', '')
-                tag_commit_sha = tag_info.get('commit_sha', '')
-                
-                if tag_info.get('found', False):
-                    self.logger.debug(f"Latest tag for {repo_name}: {latest_tag} (commit: {tag_commit_sha[:8] if tag_commit_sha else 'N/A'})")
-                else:
-                    self.logger.debug(f"No tags found for {repo_name}, using default")
-                
-                # 计算自上次标签以来的提交数量
-                commits_since_tag = 0
-                commits_since_tag_list = []
-                
-                if tag_commit_sha and commits:
-                    for commit in commits:
-                        if commit.get('sha') == tag_commit_sha:
-                            break
-                        commits_since_tag += 1
-                        commits_since_tag_list.append(commit)
-                elif not tags and commits:
-                    # 如果没有标签，显示所有提交
-                    commits_since_tag = len(commits)
-                    commits_since_tag_list = commits
-                
-                # 预测下一个标签
-                next_tag = self.generate_next_tag(latest_tag or "0.0.0")
-                
-                repo_status = {
-                    'name': repo_name,
-                    'org': org,
-                    'latest_commit': latest_commit,
-                    'latest_tag': latest_tag or "无标签",
-                    'next_tag': next_tag,
-                    'commits_since_tag': commits_since_tag,
-                    'commits_since_tag_list': commits_since_tag_list[:10],  # 只保留前10个提交用于显示
-                    'last_updated': latest_commit.get('commit', {}).get('author', {}).get('date', ''),
-                    'tag_commit_sha': tag_commit_sha
-                }
-                repos_status.append(repo_status)
+            histories = {}
+            if config.get('auth', {}).get('githubToken', ''):
+                for start in range(0, len(watch_repos), WATCH_REPOS_PER_QUERY):
+                    histories.update(self._fetch_watch_repos_graphql(org, watch_repos[start:start + WATCH_REPOS_PER_QUERY]))
+            
+            def repo_status(repo_name: str) -> Dict[str, Any]:
+                try:
+                    if repo_name in histories:
+                        branch, commits, tag_hint = histories[repo_name]
+                        resolution = self.tag_resolver.resolve(org, repo_name, branch, history=commits, tag_hint=tag_hint)
+                    else:
+                        self.logger.info(f"Processing repo: {org}/{repo_name}")
+                        resolution = self.tag_resolver.resolve(org, repo_name)
+                except Exception as e:
+                    self.logger.error(f"Resolve watch repo {org}/{repo_name} failed: {str(e)}")
+                    resolution = {}
+                return self._build_repo_status(org, repo_name, resolution)
+            
+            with ThreadPoolExecutor(max_workers=min(8, len(watch_repos))) as executor:
+                repos_status = list(executor.map(repo_status, watch_repos))
             
             # 按最后更新时间排序
             repos_status.sort(key=lambda x: x.get('last_updated', ''), reverse=True)
+            self._watch_status = repos_status
             return repos_status
             
         except Exception as e:
             self.logger.error(f"Get watch repos status failed: {str(e)}")
-            return []
+            return self._watch_status or []
+    
+    def _fetch_watch_repos_graphql(self, org: str, repo_names: List[str]) -> Dict[str, tuple]:
+        """用一次GraphQL查询获取多个仓库的默认分支历史和标签
+
+        返回 {仓库名: (默认分支, REST格式的提交列表, 提交SHA到标签名的索引)}，查询失败的仓库不在结果中
+        """
+        fields = f"""
+            defaultBranchRef {{
+                name
+                target {{
+                    ... on Commit {{
+                        history(first: {WATCH_HISTORY_DEPTH}) {{
+                            nodes {{
+                                oid url message
+                                author {{ name email date user {{ login }} }}
+                                committer {{ name email date }}
+                            }}
+                        }}
+                    }}
+                }}
+            }}
+            refs(refPrefix: "refs/tags/", first: {WATCH_TAGS_DEPTH}, orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{
+                nodes {{
+                    name
+                    target {{ oid ... on Tag {{ target {{ oid }} }} }}
+                }}
+            }}
+        """
+        aliases = [
+            f"r{i}: repository(owner: {json.dumps(org)}, name: {json.dumps(name)}) {{ {fields} }}"
+            for i, name in enumerate(repo_names)
+        ]
+        query = "query { " + " ".join(aliases) + " }"
+        
+        try:
+            result = self._github_graphql(query)
+        except Exception as e:
+            self.logger.warning(f"GraphQL watch repos query failed, falling back to REST: {str(e)}")
+            return {}
+        
+        for error in result.get('errors') or []:
+            self.logger.warning(f"GraphQL watch repos error: {error.get('message', error)}")
+        
+        data = result.get('data') or {}
+        repo_data = {}
+        for i, name in enumerate(repo_names):
+            repository = data.get(f"r{i}")
+            if not repository:
+                continue
+            
+            branch_ref = repository.get('defaultBranchRef') or {}
+            target = branch_ref.get('target') or {}
+            commits = []
+            for node in (target.get('history') or {}).get('nodes', []):
+                author = node.get('author') or {}
+                commits.append({
+                    'sha': node['oid'],
+                    'html_url': node.get('url', ''),
+                    'commit': {
+                        'message': node.get('message', ''),
+                        'author': {'name': author.get('name', ''), 'email': author.get('email', ''), 'date': author.get('date', '')},
+                        'committer': node.get('committer') or {}
+                    },
+                    'author': author.get('user')
+                })
+            
+            tag_hint = {}
+            for node in (repository.get('refs') or {}).get('nodes', []):
+                tag_target = node.get('target') or {}
+                # 附注标签需要取其指向的提交
+                commit_sha = (tag_target.get('target') or {}).get('oid') or tag_target.get('oid', '')
+                tag_hint.setdefault(commit_sha, []).append(node['name'])
+            
+            repo_data[name] = (branch_ref.get('name'), commits, tag_hint)
+        return repo_data
+    
+    def _build_repo_status(self, org: str, repo_name: str, resolution: Dict[str, Any]) -> Dict[str, Any]:
+        """根据标签解析结果生成关注仓库的状态"""
+        latest_commit = resolution.get('head_commit') or {}
+        latest_tag = resolution.get('tag', '') if resolution.get('found', False) else ''
+        tag_commit_sha = resolution.get('commit_sha', '')
+        
+        # 预测下一个标签
+        next_tag = self.generate_next_tag(latest_tag or "0.0.0")
+        
+        return {
+            'name': repo_name,
+            'org': org,
+            'latest_commit': latest_commit,
+            'latest_tag': latest_tag or "无标签",
+            'next_tag': next_tag,
+            'commits_since_tag': resolution.get('commits_since', 0),
+            'commits_since_tag_list': resolution.get('commits_since_list', []),  # 只保留前10个提交用于显示
+            'last_updated': latest_commit.get('commit', {}).get('author', {}).get('date', ''),
+            'tag_commit_sha': tag_commit_sha
+        }
     
     def get_commits_since_tag(self, org: str, repo: str, tag_sha: str) -> List[Dict[str, Any]]:
         """获取自指定标签以来的提交列表"""
@@ -473,25 +591,7 @@ Signed-off-by: {deb_email}"""
             # 使用GitHub API的比较功能
             url = f"{self.github_api_base}/repos/{org}/{repo}/compare/{tag_sha}...HEAD"
             
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            comparison = response.json()
+            comparison = self._github_get(url)
             return comparison.get('commits', [])
             
         except Exception as e:
@@ -501,14 +601,8 @@ Signed-off-by: {deb_email}"""
     def get_commits_since_tag_detailed(self, org: str, repo: str, tag: str) -> List[Dict[str, Any]]:
         """获取自指定标签以来的详细提交信息"""
         try:
-            # 首先获取标签信息
-            tags = self.get_repo_tags(org, repo)
-            tag_commit_sha = None
-            
-            for tag_info in tags:
-                if tag_info.get('name') == tag:
-                    tag_commit_sha = tag_info.get('commit', {}).get('sha')
-                    break
+            # 首先通过标签索引查找标签指向的提交
+            tag_commit_sha = self.tag_resolver.find_tag_sha(org, repo, tag)
             
             if not tag_commit_sha:
                 self.logger.error(f"Tag {tag} not found in {org}/{repo}")
@@ -517,31 +611,10 @@ Signed-off-by: {deb_email}"""
             # 使用GitHub API的比较功能获取详细提交信息
             url = f"{self.github_api_base}/repos/{org}/{repo}/compare/{tag_commit_sha}...HEAD"
             
-            # 设置代理
-            git_config = config_manager.get_git_config()
-            proxy = git_config.get('auth', {}).get('proxy', '')
-            proxies = None
-            if proxy:
-                proxies = {
-                    'http': proxy,
-                    'https': proxy
-                }
-            
-            response = requests.get(
-                url,
-                headers=self._get_github_headers(),
-                proxies=proxies,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            comparison = response.json()
-            commits = comparison.get('commits', [])
-            
-            # 按时间倒序排序
-            commits.sort(key=lambda x: x.get('commit', {}).get('author', {}).get('date', ''), reverse=True)
-            
-            return commits
+            comparison = self._github_get(url)
+            # 按时间倒序排序（响应体可能来自ETag缓存，不原地修改）
+            return sorted(comparison.get('commits', []),
+                          key=lambda x: x.get('commit', {}).get('author', {}).get('date', ''), reverse=True)
             
         except Exception as e:
             self.logger.error(f"Get detailed commits since tag failed: {str(e)}")
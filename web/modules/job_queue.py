@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+class JobQueue:
+    """后台任务队列
+
+    任务在有界线程池中执行，最多同时运行max_workers个任务，其余排队等待。
+    任务状态和每一项的结果写入cache目录下的状态文件，多worker部署时任意worker都可以查询进度；
+    状态文件超过retention秒没有更新时清理。任务记录所在进程的pid，读取时发现该进程已退出（如worker重启），
+    未结束的任务标记为失败。
+    """
+
+    def __init__(self, max_workers: int = 2, job_dir: str = None, retention: int = 3600):
+        if job_dir is None:
+            job_dir = os.path.join(os.path.dirname(__file__), '../cache/jobs')
+        self.job_dir = os.path.abspath(job_dir)
+        self.retention = retention
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        # 本进程中尚未结束的任务
+        self._active = set()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _save(self, job: Dict[str, Any]):
+        path = self._path(job['id'])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def submit(self, kind: str, items: List[str],
+               run: Callable[[Callable[[int, Dict[str, Any]], None]], Any],
+               on_done: Optional[Callable[[], None]] = None) -> str:
+        """提交任务，立即返回任务ID
+
+        items为各项的名称；run在后台线程中执行，参数progress(index, result)用于上报第index项的结果，
+        result中包含error时该项视为失败，run返回的字典作为任务摘要（summary）。on_done在任务结束后调用。
+        """
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._cleanup()
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'total': len(items),
+            'completed': 0,
+            'failed': 0,
+            'items': [{'name': name, 'status': 'pending', 'result': None} for name in items],
+            'message': '',
+            'summary': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'pid': os.getpid()
+        }
+        with self._lock:
+            self._active.add(job['id'])
+            self._save(job)
+        self._executor.submit(self._run, job, run, on_done)
+        self.logger.info(f"Job {job['id']} ({kind}, {len(items)} items) queued")
+        return job['id']
+
+    def _run(self, job: Dict[str, Any], run: Callable, on_done: Optional[Callable[[], None]]):
+        def progress(index: int, result: Dict[str, Any]):
+            with self._lock:
+                item = job['items'][index]
+                if item['status'] == 'pending':
+                    job['completed'] += 1
+                item['status'] = 'error' if 'error' in result else 'success'
+                item['result'] = result
+                job['failed'] = sum(1 for entry in job['items'] if entry['status'] == 'error')
+                self._save(job)
+
+        with self._lock:
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            self._save(job)
+        summary = None
+        try:
+            summary = run(progress)
+            status, message = 'finished', ''
+        except Exception as e:
+            self.logger.error(f"Job {job['id']} failed: {str(e)}")
+            status, message = 'failed', str(e)
+
+        with self._lock:
+            job['summary'] = summary if isinstance(summary, dict) else None
+            job['status'] = status
+            job['message'] = message
+            job['finished_at'] = time.time()
+            self._save(job)
+            self._active.discard(job['id'])
+        self.logger.info(f"Job {job['id']} {status}: {job['completed']}/{job['total']} completed, {job['failed']} failed")
+        if on_done:
+            try:
+                on_done()
+            except Exception as e:
+                self.logger.warning(f"Job {job['id']} completion callback failed: {str(e)}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """读取任务状态，任务不存在时返回None"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if job['status'] in ('queued', 'running') and self._is_orphaned(job):
+            with self._lock:
+                # 持锁后重新读取，避免覆盖本进程中刚结束的任务
+                try:
+                    with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                        job = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    return None
+                if job['status'] in ('queued', 'running') and job['id'] not in self._active:
+                    job['status'] = 'failed'
+                    job['message'] = '任务所在进程已退出，任务未完成'
+                    job['finished_at'] = time.time()
+                    self._save(job)
+                    self.logger.warning(f"Job {job_id} orphaned by process {job.get('pid')}, marked as failed")
+        return job
+
+    def _is_orphaned(self, job: Dict[str, Any]) -> bool:
+        """任务所在进程已退出时返回True"""
+        pid = job.get('pid')
+        if pid == os.getpid():
+            # pid被重启后的本进程复用时，任务不在本进程的活动任务中
+            return job['id'] not in self._active
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except (PermissionError, TypeError):
+            # 进程存在但属于其他用户，或旧版本的状态文件没有pid
+            return False
+        return False
+
+    def _cleanup(self):
+        """清理超过retention秒没有更新的任务状态文件"""
+        now = time.time()
+        for filename in os.listdir(self.job_dir):
+            path = os.path.join(self.job_dir, filename)
+            try:
+                if filename.endswith('.json') and now - os.stat(path).st_mtime > self.retention:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,128 @@
+import os
+import json
+import fcntl
+import time
+import threading
+import contextlib
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+class PRTracker:
+    """服务端的标签PR跟踪列表
+
+    跟踪列表和最近一次的状态保存在cache目录下，所有浏览器和worker共用；
+    状态超过refresh_interval秒才刷新，一次批量查询获取所有PR的状态，刷新在文件锁内进行，
+    因此无论打开多少页面、跟踪多少PR，每个周期只有一次上游请求。
+    throttle返回True（如GitHub额度紧张）时，已有状态的情况下跳过非强制的刷新。
+    """
+
+    def __init__(self, fetch_statuses: Callable[[List[Dict[str, Any]]], Dict[str, Dict[str, Any]]],
+                 data_file: str = None, refresh_interval: int = 30,
+                 throttle: Optional[Callable[[], bool]] = None):
+        if data_file is None:
+            data_file = os.path.join(os.path.dirname(__file__), '../cache/tracked-prs.json')
+        self.data_file = os.path.abspath(data_file)
+        self.fetch_statuses = fetch_statuses
+        self.refresh_interval = refresh_interval
+        self.throttle = throttle
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def pr_id(org: str, repo: str, number: int) -> str:
+        return f"{org}/{repo}/{number}"
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """进程内和跨进程的互斥"""
+        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+        with self._lock, open(f"{self.data_file}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'prs': [], 'statuses': {}, 'refreshed_at': 0}
+
+    def _save(self, data: Dict[str, Any]):
+        tmp_path = f"{self.data_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.data_file)
+
+    def add(self, org: str, repo: str, number: int, tag: str = '', pr_url: str = '',
+            created_at: Optional[str] = None) -> Dict[str, Any]:
+        """添加跟踪的PR，已存在时返回原记录"""
+        pr_id = self.pr_id(org, repo, number)
+        with self._locked():
+            data = self._load()
+            for pr in data['prs']:
+                if pr['id'] == pr_id:
+                    return pr
+            pr = {
+                'id': pr_id,
+                'org': org,
+                'repo': repo,
+                'number': number,
+                'tag': tag,
+                'pr_url': pr_url or f"https://github.com/{org}/{repo}/pull/{number}",
+                'created_at': created_at or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            }
+            data['prs'].append(pr)
+            # 新增的PR需要在下次查询时立即获取状态
+            data['refreshed_at'] = 0
+            self._save(data)
+            return pr
+
+    def remove(self, pr_id: str) -> bool:
+        with self._locked():
+            data = self._load()
+            prs = [pr for pr in data['prs'] if pr['id'] != pr_id]
+            if len(prs) == len(data['prs']):
+                return False
+            data['prs'] = prs
+            data['statuses'].pop(pr_id, None)
+            self._save(data)
+            return True
+
+    def _is_fresh(self, data: Dict[str, Any]) -> bool:
+        if time.time() - data.get('refreshed_at', 0) < self.refresh_interval:
+            return True
+        if data.get('statuses') and self.throttle and self.throttle():
+            self.logger.info("Refresh throttled, serving cached tracked PR statuses")
+            return True
+        return False
+
+    def list(self, force: bool = False) -> Dict[str, Any]:
+        """返回所有跟踪的PR及其状态，状态过期时批量刷新"""
+        data = self._load()
+        if not force and self._is_fresh(data):
+            return self._merge(data)
+
+        with self._locked():
+            # 等待锁期间其他worker可能已经刷新过
+            data = self._load()
+            if force or not self._is_fresh(data):
+                if data['prs']:
+                    try:
+                        statuses = self.fetch_statuses(data['prs'])
+                        data['statuses'].update(statuses)
+                    except Exception as e:
+                        self.logger.warning(f"Refresh tracked PR statuses failed: {e}")
+                data['refreshed_at'] = time.time()
+                self._save(data)
+        return self._merge(data)
+
+    @staticmethod
+    def _merge(data: Dict[str, Any]) -> Dict[str, Any]:
+        statuses = data.get('statuses', {})
+        return {
+            'prs': [dict(pr, **statuses.get(pr['id'], {'status': 'unknown'})) for pr in data['prs']],
+            'refreshed_at': data.get('refreshed_at', 0)
+        }
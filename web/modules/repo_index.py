@@ -0,0 +1,152 @@
+import os
+import fcntl
+import json
+import contextlib
+import re
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Any, Optional
+
+# 索引中保留的仓库字段（前端仓库列表用到的字段）
+REPO_FIELDS = (
+    'id', 'name', 'full_name', 'description', 'language', 'stargazers_count',
+    'html_url', 'default_branch', 'archived', 'updated_at', 'pushed_at'
+)
+
+class RepoIndex:
+    """组织仓库的本地索引
+
+    首次使用时分页全量同步组织下的所有仓库，之后按updated倒序增量同步，
+    遇到不晚于索引中最新更新时间的仓库即停止，查询直接读取本地索引。
+    """
+
+    def __init__(self, fetch_page: Callable[[str, int], List[Dict[str, Any]]],
+                 index_dir: str = None, refresh_interval: int = 300,
+                 full_sync_interval: int = 86400, per_page: int = 100,
+                 throttle: Optional[Callable[[], bool]] = None):
+        if index_dir is None:
+            index_dir = os.path.join(os.path.dirname(__file__), '../cache/repo-index')
+        self.index_dir = os.path.abspath(index_dir)
+        self.fetch_page = fetch_page
+        self.refresh_interval = refresh_interval
+        self.full_sync_interval = full_sync_interval
+        self.per_page = per_page
+        self.throttle = throttle
+        self.logger = logging.getLogger(__name__)
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, org: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(org, threading.Lock())
+
+    @contextlib.contextmanager
+    def _file_lock(self, org: str):
+        """跨进程的索引文件锁，多个worker进程不会同时同步同一个组织"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, f"{org}.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _index_path(self, org: str) -> str:
+        return os.path.join(self.index_dir, f"{org}.json")
+
+    def _load(self, org: str) -> Optional[Dict[str, Any]]:
+        """读取内存或磁盘中的索引，磁盘上的索引被其他worker进程更新过时重新读取"""
+        path = self._index_path(org)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return self._indexes.get(org)
+        if org in self._indexes and self._mtimes.get(org) == mtime:
+            return self._indexes[org]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self._indexes[org] = index
+            self._mtimes[org] = mtime
+            return index
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Load repo index of {org} failed: {e}")
+            return None
+
+    def _save(self, org: str, index: Dict[str, Any]):
+        """原子写入索引文件"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = self._index_path(org)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._indexes[org] = index
+        self._mtimes[org] = os.stat(path).st_mtime_ns
+
+    def sync(self, org: str, full: bool = False) -> List[Dict[str, Any]]:
+        """同步索引并返回按更新时间倒序的仓库列表"""
+        with self._lock_for(org), self._file_lock(org):
+            index = self._load(org)
+            now = time.time()
+            if index and not full:
+                if now - index.get('synced_at', 0) < self.refresh_interval:
+                    return index['repos']
+                if self.throttle and self.throttle():
+                    # 上游额度紧张时推迟定期同步，继续使用已有索引
+                    return index['repos']
+                full = now - index.get('full_synced_at', 0) >= self.full_sync_interval
+            full = full or not index
+
+            repos = {} if full else {repo['name']: repo for repo in index['repos']}
+            watermark = '' if full else max((repo.get('updated_at') or '' for repo in repos.values()), default='')
+
+            page = 1
+            while True:
+                items = self.fetch_page(org, page)
+                reached_watermark = False
+                for item in items:
+                    updated_at = item.get('updated_at') or ''
+                    if not full and updated_at <= watermark:
+                        reached_watermark = True
+                        continue
+                    repos[item['name']] = {key: item.get(key) for key in REPO_FIELDS}
+                if reached_watermark or len(items) < self.per_page:
+                    break
+                page += 1
+
+            self.logger.info(f"Synced repo index of {org}: {'full' if full else 'incremental'}, "
+                             f"{page} page(s), {len(repos)} repos")
+            index = {
+                'org': org,
+                'synced_at': now,
+                'full_synced_at': now if full else index.get('full_synced_at', 0),
+                'repos': sorted(repos.values(), key=lambda r: r.get('updated_at') or '', reverse=True)
+            }
+            self._save(org, index)
+            return index['repos']
+
+    @staticmethod
+    def _is_subsequence(query: str, text: str) -> bool:
+        it = iter(text)
+        return all(ch in it for ch in query)
+
+    def search(self, org: str, name_filter: str = '', full: bool = False) -> List[Dict[str, Any]]:
+        """大小写不敏感的模糊查询：子串匹配在前，按字符顺序的模糊匹配在后"""
+        repos = self.sync(org, full=full)
+        if not name_filter:
+            return list(repos)
+
+        query = name_filter.lower()
+        direct = []
+        fuzzy = []
+        for repo in repos:
+            name = (repo.get('name') or '').lower()
+            if query in name:
+                direct.append(repo)
+            elif self._is_subsequence(query, name):
+                fuzzy.append(repo)
+        return direct + fuzzy
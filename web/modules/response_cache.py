@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from .config_manager import config_manager
+
+# 各接口缓存的默认过期时间（秒）和条目上限，可在config.yaml的web.cache.<名称>中覆盖
+DEFAULT_CACHE_SETTINGS = {
+    'crp_topics': {'ttl': 60, 'maxsize': 64},
+    'crp_projects': {'ttl': 300, 'maxsize': 256},
+    'crp_instances': {'ttl': 30, 'maxsize': 128},
+    'git_repos': {'ttl': 60, 'maxsize': 128},
+    'git_latest_tag': {'ttl': 120, 'maxsize': 512},
+}
+
+_MISSING = object()
+
+class TTLCache:
+    """带过期时间和条目上限的LRU缓存，线程安全"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, match: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """删除满足match的条目，match为空时清空缓存，返回删除的条目数"""
+        with self._lock:
+            keys = [key for key in self._entries if match is None or match(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+class ResponseCache:
+    """Web接口上游查询（CRP、GitHub）的缓存
+
+    每个接口一个TTLCache，通过应用进行的写操作调用invalidate使相关条目失效。
+    多worker部署时失效操作会更新cache目录下的标记文件，其他worker读取缓存前检查标记并清空本地条目。
+    """
+
+    def __init__(self, marker_dir: str = None):
+        if marker_dir is None:
+            marker_dir = os.path.join(os.path.dirname(__file__), '../cache/response-cache')
+        self.marker_dir = os.path.abspath(marker_dir)
+        self.logger = logging.getLogger(__name__)
+        self._caches: Dict[str, TTLCache] = {}
+        self._marker_mtimes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _cache_for(self, name: str) -> TTLCache:
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                settings = dict(DEFAULT_CACHE_SETTINGS.get(name, {'ttl': 60, 'maxsize': 128}))
+                settings.update(config_manager.get_web_config().get('cache', {}).get(name, {}))
+                cache = TTLCache(float(settings['ttl']), int(settings['maxsize']))
+                self._caches[name] = cache
+            return cache
+
+    def _marker_path(self, name: str) -> str:
+        return os.path.join(self.marker_dir, f"{name}.invalidated")
+
+    def _sync_invalidation(self, name: str, cache: TTLCache):
+        """其他worker使该接口的缓存失效后，清空本进程中的条目"""
+        try:
+            mtime = os.stat(self._marker_path(name)).st_mtime_ns
+        except OSError:
+            return
+        if self._marker_mtimes.get(name) != mtime:
+            self._marker_mtimes[name] = mtime
+            cache.invalidate()
+
+    def get_or_load(self, name: str, key: Hashable, loader: Callable[[], Any],
+                    should_cache: Callable[[Any], bool] = bool) -> Any:
+        """返回缓存的结果，未命中时调用loader并在should_cache为真时写入缓存（默认不缓存空结果）"""
+        cache = self._cache_for(name)
+        self._sync_invalidation(name, cache)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if should_cache(value):
+            cache.set(key, value)
+        return value
+
+    def invalidate(self, name: str, match: Optional[Callable[[Hashable], bool]] = None):
+        """使接口缓存中满足match的条目失效（match为空时全部失效），并通知其他worker"""
+        cache = self._cache_for(name)
+        removed = cache.invalidate(match)
+        self.logger.debug(f"Invalidated {removed} cached {name} entries")
+        try:
+            os.makedirs(self.marker_dir, exist_ok=True)
+            path = self._marker_path(name)
+            with open(path, 'a'):
+                os.utime(path)
+            self._marker_mtimes[name] = os.stat(path).st_mtime_ns
+        except OSError as e:
+            self.logger.warning(f"Update cache invalidation marker of {name} failed: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: cache.stats() for name, cache in caches.items()}
+
+# 全局响应缓存实例
+response_cache = ResponseCache()
@@ -0,0 +1,161 @@
+import re
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+VERSION_PATTERN = re.compile(r'^v?(\d+)\.(\d+)\.(\d+)')
+
+def version_key(tag_name: str) -> Tuple[int, int, int]:
+    match = VERSION_PATTERN.match(tag_name)
+    return tuple(int(part) for part in match.groups()) if match else (0, 0, 0)
+
+class TagResolver:
+    """按分支历史解析仓库的最新标签（类似git describe --tags --abbrev=0）
+
+    用提交SHA到标签的索引匹配分支历史，从分支头开始分页向下查找，遇到第一个有标签的提交即停止；
+    解析结果只取决于分支头提交的历史，按(仓库, 分支头SHA)缓存，分支没有新提交时不再请求历史。
+    标签索引重建后内容有变化（如在已解析过的提交上补推了标签）时，该仓库的解析结果全部失效。
+    """
+
+    def __init__(self, github_get: Callable[[str, Optional[Dict[str, Any]]], Any], api_base: str,
+                 per_page: int = 100, max_pages: int = 20, tag_index_ttl: int = 300, maxsize: int = 512):
+        self.github_get = github_get
+        self.api_base = api_base
+        self.per_page = per_page
+        self.max_pages = max_pages
+        self.tag_index_ttl = tag_index_ttl
+        self.maxsize = maxsize
+        self.logger = logging.getLogger(__name__)
+        self._resolved: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._tag_indexes: Dict[Tuple[str, str], Tuple[float, Dict[str, List[str]]]] = {}
+        self._lock = threading.Lock()
+
+    def tag_index(self, org: str, repo: str, refresh: bool = False) -> Dict[str, List[str]]:
+        """分页获取仓库所有标签，返回提交SHA到标签名列表的索引（同一提交的多个标签按版本号从大到小）"""
+        key = (org, repo)
+        with self._lock:
+            cached = self._tag_indexes.get(key)
+        if cached and not refresh and time.monotonic() - cached[0] < self.tag_index_ttl:
+            return cached[1]
+
+        index: Dict[str, List[str]] = {}
+        page = 1
+        while True:
+            tags = self.github_get(f"{self.api_base}/repos/{org}/{repo}/tags", {'per_page': self.per_page, 'page': page})
+            for tag in tags:
+                sha = tag.get('commit', {}).get('sha', '')
+                if sha:
+                    index.setdefault(sha, []).append(tag.get('name', ''))
+            if len(tags) < self.per_page:
+                break
+            page += 1
+        for names in index.values():
+            names.sort(key=version_key, reverse=True)
+
+        with self._lock:
+            previous = self._tag_indexes.get(key)
+            self._tag_indexes[key] = (time.monotonic(), index)
+            if previous is not None and previous[1] != index:
+                stale = [resolved for resolved in self._resolved if resolved[:2] == key]
+                for resolved in stale:
+                    del self._resolved[resolved]
+                self.logger.debug(f"Tags of {org}/{repo} changed, dropped {len(stale)} resolved results")
+        return index
+
+    def find_tag_sha(self, org: str, repo: str, tag_name: str) -> Optional[str]:
+        """通过标签索引查找标签指向的提交SHA，索引中没有时刷新一次"""
+        for refresh in (False, True):
+            for sha, names in self.tag_index(org, repo, refresh=refresh).items():
+                if tag_name in names:
+                    return sha
+        return None
+
+    def _history_page(self, org: str, repo: str, branch: Optional[str], page: int) -> List[Dict[str, Any]]:
+        params = {'per_page': self.per_page, 'page': page}
+        if branch:
+            params['sha'] = branch
+        return self.github_get(f"{self.api_base}/repos/{org}/{repo}/commits", params)
+
+    def cached(self, org: str, repo: str, head_sha: str) -> Optional[Dict[str, Any]]:
+        """返回(仓库, 分支头SHA)对应的已解析结果
+
+        先按当前标签索引（tag_index_ttl内复用，过期时重建并使有变化的仓库的结果失效）校验：
+        分支头提交上有解析结果以外的标签时视为过期。
+        """
+        key = (org, repo, head_sha)
+        with self._lock:
+            if key not in self._resolved:
+                return None
+        head_tags = self.tag_index(org, repo).get(head_sha)
+        with self._lock:
+            result = self._resolved.get(key)
+            if result is None:
+                return None
+            if head_tags and result.get('tag') != head_tags[0]:
+                del self._resolved[key]
+                return None
+            self._resolved.move_to_end(key)
+            return result
+
+    def resolve(self, org: str, repo: str, branch: Optional[str] = None,
+                history: Optional[List[Dict[str, Any]]] = None,
+                tag_hint: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """解析分支上最近的标签
+
+        history为调用方已经拿到的分支最新提交（REST格式，按per_page分页的前若干页），可以省去重复请求；
+        tag_hint为调用方已知的部分标签索引，在history范围内命中时不再获取完整标签列表。
+        history不足一页时视为分支的完整历史。
+        返回tag、commit_sha、found、head_sha、head_commit、commits_since（标签之后的提交数）和commits_since_list（最多10个）。
+        """
+        if history is None:
+            history = self._history_page(org, repo, branch, 1)
+        if not history:
+            return {'tag': '0.0.0', 'commit_sha': '', 'found': False, 'head_sha': '', 'head_commit': {},
+                    'commits_since': 0, 'commits_since_list': []}
+
+        head_sha = history[0].get('sha', '')
+        result = self.cached(org, repo, head_sha)
+        if result is not None:
+            return result
+
+        result = None
+        if tag_hint:
+            result = self._walk(org, repo, branch, history, tag_hint, extend=False)
+        if result is None:
+            result = self._walk(org, repo, branch, history, self.tag_index(org, repo), extend=True)
+
+        with self._lock:
+            self._resolved[(org, repo, head_sha)] = result
+            while len(self._resolved) > self.maxsize:
+                self._resolved.popitem(last=False)
+        return result
+
+    def _walk(self, org: str, repo: str, branch: Optional[str], history: List[Dict[str, Any]],
+              index: Dict[str, List[str]], extend: bool) -> Optional[Dict[str, Any]]:
+        """从分支头向下查找第一个有标签的提交；extend为False时只查找history范围内，找不到返回None"""
+        head = {'head_sha': history[0].get('sha', ''), 'head_commit': history[0]}
+        since = []
+        commits = history
+        page = len(history) // self.per_page
+        while True:
+            for commit in commits:
+                sha = commit.get('sha', '')
+                names = index.get(sha)
+                if names:
+                    self.logger.debug(f"Found tag {names[0]} of {org}/{repo} at {sha[:8]}, {len(since)} commits behind head")
+                    return {'tag': names[0], 'commit_sha': sha, 'found': True, **head,
+                            'commits_since': len(since), 'commits_since_list': since[:10]}
+                since.append(commit)
+            # 历史不足一页说明已到达第一个提交
+            if not extend or len(commits) < self.per_page or page >= self.max_pages:
+                break
+            page += 1
+            commits = self._history_page(org, repo, branch, page)
+
+        if not extend:
+            return None
+        self.logger.debug(f"No tag found in the last {len(since)} commits of {org}/{repo}")
+        return {'tag': '0.0.0', 'commit_sha': '', 'found': False, **head,
+                'commits_since': len(since), 'commits_since_list': since[:10]}
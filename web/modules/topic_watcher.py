@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import fcntl
+import queue
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+def instance_key(instance: Dict[str, Any]) -> str:
+    """打包实例的唯一标识"""
+    if instance.get('ID') is not None:
+        return str(instance['ID'])
+    return f"{instance.get('ProjectName', '')}@{instance.get('Branch', '')}"
+
+def build_state(instance: Dict[str, Any]) -> str:
+    return json.dumps(instance.get('BuildState'), sort_keys=True, ensure_ascii=False)
+
+class TopicWatcher:
+    """单个主题的打包实例轮询器
+
+    同一主题的所有订阅者共用一个后台轮询线程：新订阅者先收到完整的snapshot事件，
+    之后每个轮询周期只推送BuildState发生变化（或新增、删除）的实例。没有订阅者时线程退出。
+    """
+
+    def __init__(self, topic: str, fetch: Callable[[str], List[Dict[str, Any]]], interval: float):
+        self.topic = topic
+        self.fetch = fetch
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._subscribers: Dict[queue.Queue, bool] = {}
+        self._instances: Optional[List[Dict[str, Any]]] = None
+        self._states: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        subscription = queue.Queue()
+        with self._lock:
+            if self._instances is not None:
+                subscription.put(('snapshot', self._snapshot(self._instances)))
+            self._subscribers[subscription] = self._instances is not None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"topic-watcher-{self.topic}", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            self._subscribers.pop(subscription, None)
+            if not self._subscribers:
+                self._wakeup.set()
+
+    @staticmethod
+    def _snapshot(instances: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {'instances': [{'key': instance_key(instance), 'instance': instance} for instance in instances]}
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self._poll()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def _poll(self):
+        try:
+            instances = self.fetch(self.topic)
+        except Exception as e:
+            self.logger.warning(f"Poll instances of topic {self.topic} failed: {e}")
+            self._broadcast_all(('poll_error', {'message': f'获取打包列表失败: {str(e)}'}))
+            return
+
+        states = {instance_key(instance): build_state(instance) for instance in instances}
+        changed = [
+            {'key': key, 'instance': instance}
+            for key, instance in ((instance_key(instance), instance) for instance in instances)
+            if self._states.get(key) != states[key]
+        ]
+        removed = [key for key in self._states if key not in states]
+
+        with self._lock:
+            first_poll = self._instances is None
+            self._instances = instances
+            self._states = states
+            snapshot = None
+            for subscription, has_snapshot in list(self._subscribers.items()):
+                if not has_snapshot:
+                    snapshot = snapshot or self._snapshot(instances)
+                    subscription.put(('snapshot', snapshot))
+                    self._subscribers[subscription] = True
+                elif not first_poll and (changed or removed):
+                    subscription.put(('changed', {'instances': changed, 'removed': removed}))
+
+    def _broadcast_all(self, event):
+        with self._lock:
+            for subscription in self._subscribers:
+                subscription.put(event)
+
+class TopicWatchHub:
+    """按主题管理TopicWatcher
+
+    多worker部署时各worker的轮询结果写入共享快照文件：同一周期内已有其他worker轮询过时直接读取快照，
+    因此无论多少浏览器和worker在关注同一主题，每个周期只有一次上游请求。
+    """
+
+    def __init__(self, fetch: Callable[[str], List[Dict[str, Any]]], interval: float = 10,
+                 snapshot_dir: str = None):
+        if snapshot_dir is None:
+            snapshot_dir = os.path.join(os.path.dirname(__file__), '../cache/topic-watch')
+        self.snapshot_dir = os.path.abspath(snapshot_dir)
+        self.fetch = fetch
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._watchers: Dict[str, TopicWatcher] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> queue.Queue:
+        with self._lock:
+            watcher = self._watchers.get(topic)
+            if watcher is None:
+                watcher = self._watchers[topic] = TopicWatcher(topic, self._fetch_shared, self.interval)
+            return watcher.subscribe()
+
+    def unsubscribe(self, topic: str, subscription: queue.Queue):
+        with self._lock:
+            watcher = self._watchers.get(topic)
+        if watcher:
+            watcher.unsubscribe(subscription)
+
+    def _fetch_shared(self, topic: str) -> List[Dict[str, Any]]:
+        """读取本周期内的共享快照，过期时在文件锁内轮询上游并更新快照"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        base = os.path.join(self.snapshot_dir, re.sub(r'[^\w.-]', '_', topic))
+        path = f"{base}.json"
+        # 略小于轮询间隔，避免与其他worker的周期错开时重复轮询
+        max_age = self.interval * 0.8
+
+        def read_fresh() -> Optional[List[Dict[str, Any]]]:
+            try:
+                if time.time() - os.stat(path).st_mtime < max_age:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+            return None
+
+        instances = read_fresh()
+        if instances is not None:
+            return instances
+        with open(f"{base}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                instances = read_fresh()
+                if instances is not None:
+                    return instances
+                instances = self.fetch(topic)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(instances, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                return instances
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,116 @@
+import re
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+# 剩余额度低于上限的该比例（且不少于LOW_BUDGET_MIN次）时视为额度紧张，暂停非交互式刷新
+LOW_BUDGET_RATIO = 0.1
+LOW_BUDGET_MIN = 50
+# 每个接口保留最近多少次调用的耗时用于计算分位数
+LATENCY_SAMPLES = 200
+
+class RateLimitBudget:
+    """GitHub速率限制额度跟踪
+
+    从每个GitHub响应的X-RateLimit-*头和GraphQL的rateLimit字段更新各资源（core、graphql等）的剩余额度。
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, Dict[str, Any]] = {}
+        self._graphql_cost = 0
+        self._lock = threading.Lock()
+
+    def record_headers(self, headers) -> Optional[str]:
+        """记录响应头中的速率限制信息，返回资源名"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return None
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        with self._lock:
+            self._resources[resource] = {
+                'limit': int(headers.get('X-RateLimit-Limit', 0) or 0),
+                'remaining': int(remaining),
+                'used': int(headers.get('X-RateLimit-Used', 0) or 0),
+                'reset': int(headers.get('X-RateLimit-Reset', 0) or 0),
+                'updated_at': time.time()
+            }
+        return resource
+
+    def record_graphql_cost(self, cost: int):
+        """记录GraphQL查询的点数消耗"""
+        with self._lock:
+            self._graphql_cost += cost
+
+    def is_low(self, resource: str = 'core') -> bool:
+        """额度是否紧张；重置时间已过或尚无记录时视为充足"""
+        with self._lock:
+            state = self._resources.get(resource)
+        if not state or state['reset'] <= time.time():
+            return False
+        return state['remaining'] <= max(LOW_BUDGET_MIN, state['limit'] * LOW_BUDGET_RATIO)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            resources = {name: dict(state) for name, state in self._resources.items()}
+            graphql_cost = self._graphql_cost
+        now = time.time()
+        for state in resources.values():
+            state['reset_in'] = max(0, int(state['reset'] - now))
+        return {'resources': resources, 'graphql_cost': graphql_cost}
+
+class UpstreamMetrics:
+    """上游接口（GitHub等）的调用次数、错误数和耗时统计"""
+
+    def __init__(self):
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def github_endpoint(url: str) -> str:
+        """把GitHub API地址归一化为接口名，如 GET /repos/:owner/:repo/commits"""
+        path = re.sub(r'^https://api\.github\.com', '', url)
+        path = re.sub(r'^/repos/[^/]+/[^/]+', '/repos/:owner/:repo', path)
+        path = re.sub(r'^/orgs/[^/]+', '/orgs/:org', path)
+        path = re.sub(r'/compare/[^/]+$', '/compare/:basehead', path)
+        path = re.sub(r'/\d+(?=/|$)', '/:number', path)
+        return path
+
+    def record(self, service: str, endpoint: str, status: int, elapsed: float):
+        """记录一次调用，status为HTTP状态码，请求异常时为0"""
+        name = f"{service} {endpoint}"
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = {
+                    'calls': 0, 'errors': 0, 'statuses': {}, 'total_time': 0.0,
+                    'max_time': 0.0, 'samples': deque(maxlen=LATENCY_SAMPLES)
+                }
+            stats['calls'] += 1
+            if status == 0 or status >= 400:
+                stats['errors'] += 1
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            stats['samples'].append(elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {name: dict(stats, samples=sorted(stats['samples'])) for name, stats in self._endpoints.items()}
+        result = {}
+        for name, stats in endpoints.items():
+            samples = stats.pop('samples')
+            result[name] = {
+                'calls': stats['calls'],
+                'errors': stats['errors'],
+                'statuses': stats['statuses'],
+                'avg_ms': round(stats['total_time'] / stats['calls'] * 1000, 1),
+                'p50_ms': round(samples[len(samples) // 2] * 1000, 1),
+                'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+                'max_ms': round(stats['max_time'] * 1000, 1)
+            }
+        return result
+
+# 全局实例
+github_budget = RateLimitBudget()
+upstream_metrics = UpstreamMetrics()